@@ -1,11 +1,48 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+import codecs
 import os
-import re
+import tempfile
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, wait
 from io import BytesIO
 from datetime import datetime
-import json
+
+from batch import simplify_batch
+from classifier import ACTION, classify
+from document import Document, iter_sentences
+from encoding import ResponseJSONProvider, compress_response
+import fastjson
+from history_store import HistoryStore
+from imaging import (
+    UPLOAD_SPOOL_BYTES,
+    ImageTooLarge,
+    check_pixel_budget,
+    frame_count,
+    is_pdf,
+    iter_frames,
+    iter_pdf_pages,
+    pdf_rasterizer_available,
+    prepare_image,
+    upload_file,
+)
+from incremental import EditStates, SimplifyState, list_splice, merge_patch, sentence_memo_stats
+from jobs import JobTable, JobTableFull
+import metrics
+from metrics import span
+from ocr_lines import assemble_lines
+from ocr_pool import OCRQueueFull, pool_from_env
+from readability import ReadabilityTally, tally_report
+from result_cache import ResultCache
+from simplifier import (
+    _action_text, _detect_pros_cons, _detect_stakeholders, _grade_settings, _join_simplified,
+    _simplify_sentence, _split_sentences, extract_action_items, extract_actions, simplify_sentences,
+    simplify_text_rule_based,
+)
+from summarizer import get_summarizer
+from translation_memory import TranslationMemory
+from vocab import VOCAB_VERSION
 
 try:
     from PIL import Image
@@ -25,225 +62,145 @@ try:
 except Exception:
     _translator = None
 
+_translation_memory = TranslationMemory(
+    _translator,
+    max_entries=int(os.environ.get('PLAINSPEAK_TM_ENTRIES', '50000')),
+) if _translator is not None else None
+
+class UploadRequest(Request):
+    # werkzeug keeps uploads under 500 KB in memory; make the cut-off
+    # configurable, and spooled uploads are read back from the temp file
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None or total_content_length > UPLOAD_SPOOL_BYTES:
+            return tempfile.TemporaryFile('wb+')
+        return BytesIO()
+
+
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.json = ResponseJSONProvider(app)
+# bigger bodies get a 413 before they are read (or as soon as a chunked one
+# goes past the limit)
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.environ.get('PLAINSPEAK_MAX_BODY_MB', '64')) * 1024 * 1024)
 CORS(app)
 
-_summarizer = None
-_history = []
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+_history = HistoryStore(
+    os.environ.get('PLAINSPEAK_HISTORY_DB', os.path.join(BASE_DIR, 'history.db')),
+    max_items=int(os.environ.get('PLAINSPEAK_HISTORY_MAX', '10000')),
+)
 
-def simplify_text_rule_based(text: str, target_grade: int = 8) -> str:
-    sentences = _split_sentences(text)
-    
-    # different reading levels need different amounts of text
-    if target_grade <= 5:
-        num_sentences = 4
-        simplify_vocab = True
-        max_words_per_sentence = 30
-    elif target_grade <= 8:
-        num_sentences = 4
-        simplify_vocab = False
-        max_words_per_sentence = None
-    elif target_grade <= 12:
-        num_sentences = 7
-        simplify_vocab = False
-        max_words_per_sentence = None
-    else:
-        num_sentences = 10
-        simplify_vocab = False
-        max_words_per_sentence = None
-    
-    key_sentences = sentences[:num_sentences]
-    
-    simplified_sentences = []
-    for sentence in key_sentences:
-        if not sentence.strip():
-            continue
-            
-        simplified_sentence = sentence.strip()
-        
-        # for elementary, replace complex words with simple ones
-        if simplify_vocab:
-            replacements = {
-                r'\butilize\b': 'use',
-                r'\bcommence\b': 'start',
-                r'\bterminate\b': 'end',
-                r'\bpurchase\b': 'buy',
-                r'\bsubsequent\b': 'next',
-                r'\bprior to\b': 'before',
-                r'\bin order to\b': 'to',
-                r'\bnotwithstanding\b': 'despite',
-                r'\bfacilitate\b': 'help',
-                r'\bdemonstrate\b': 'show',
-                r'\badditional\b': 'more',
-                r'\brequire\b': 'need',
-                r'\bobtain\b': 'get',
-                r'\bprovide\b': 'give',
-                r'\bassist\b': 'help',
-            }
-            for pattern, replacement in replacements.items():
-                simplified_sentence = re.sub(pattern, replacement, simplified_sentence, flags=re.IGNORECASE)
-        
-        # truncate really long sentences
-        if max_words_per_sentence:
-            words = simplified_sentence.split()
-            if len(words) > max_words_per_sentence:
-                simplified_sentence = ' '.join(words[:max_words_per_sentence]) + '...'
-        
-        simplified_sentences.append(simplified_sentence)
-    
-    simplified = '. '.join(simplified_sentences)
-    
-    if simplified and not simplified.endswith('.') and not simplified.endswith('...'):
-        simplified += '.'
-    
-    return simplified or text[:200]
+# bump when simplify/extract output changes so old cache entries stop matching
+ENGINE_VERSION = 'rules-2+' + VOCAB_VERSION
 
+_result_cache = ResultCache(
+    max_bytes=int(os.environ.get('PLAINSPEAK_CACHE_BYTES', str(32 * 1024 * 1024))),
+    ttl=float(os.environ.get('PLAINSPEAK_CACHE_TTL', '3600')),
+    disk_dir=os.environ.get('PLAINSPEAK_CACHE_DIR') or None,
+)
 
-def get_summarizer():
-    return None
+# states of recent /simplify results, so an edit of one can be redone
+# sentence by sentence. Per worker: a resubmit that lands on a worker
+# without its base gets a full response instead of a patch.
+_edit_states = EditStates(
+    max_bytes=int(os.environ.get('PLAINSPEAK_EDIT_STATES_BYTES', str(256 * 1024 * 1024))),
+)
 
+_ocr_pool = pool_from_env()
 
-def extract_actions(text: str) -> list:
-    if not text:
-        return []
-    
-    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
-    # look for action keywords
-    cues = re.compile(r"\b(must|should|need to|required|please|due|by\s+\w+|submit|pay|complete|bring|provide|sign)\b", re.IGNORECASE)
-    
-    actions = []
-    for s in sentences:
-        if cues.search(s):
-            s_clean = s.strip()
-            
-            # dont make actions too long
-            if len(s_clean) > 240:
-                s_clean = s_clean[:237].rstrip() + "..."
-            
-            actions.append(s_clean)
-    
-    # remove duplicates
-    seen = set()
-    unique_actions = []
-    
-    for a in actions:
-        key = a.lower()
-        if key not in seen:
-            seen.add(key)
-            unique_actions.append(a)
-    
-    return unique_actions
+# keyed by the decoded pixels, so it doesn't matter how the file was encoded
+_ocr_cache = ResultCache(
+    max_bytes=int(os.environ.get('PLAINSPEAK_OCR_CACHE_BYTES', str(16 * 1024 * 1024))),
+    ttl=float(os.environ.get('PLAINSPEAK_OCR_CACHE_TTL', '86400')),
+    disk_dir=os.environ.get('PLAINSPEAK_OCR_CACHE_DIR') or None,
+)
+_tesseract_version = None
 
+_jobs = JobTable(
+    ttl=float(os.environ.get('PLAINSPEAK_JOB_TTL', '300')),
+    max_jobs=int(os.environ.get('PLAINSPEAK_JOB_MAX', '1000')),
+)
+JOB_KEEPALIVE_SECONDS = 15
 
-def _split_sentences(text: str) -> list:
-    if not text:
-        return []
-    return re.split(r"(?<=[.!?])\s+", text.strip())
+OCR_MAX_PAGES = int(os.environ.get('PLAINSPEAK_OCR_MAX_PAGES', '50'))
 
+BATCH_MAX_DOCUMENTS = int(os.environ.get('PLAINSPEAK_BATCH_MAX', '10000'))
 
-def _detect_pros_cons(sentences):
-    pros_kw = re.compile(
-        r"\b(benefit|improve|support|enable|opportunity|increase|protect|help|reduce costs?)\b", 
-        re.I
-    )
-    cons_kw = re.compile(
-        r"\b(risk|concern|cost|harm|limit|reduce|decrease|burden|challenge|problem)\b", 
-        re.I
-    )
-    
-    pros = []
-    cons = []
-    
-    for s in sentences:
-        if pros_kw.search(s) and not cons_kw.search(s):
-            pros.append(s.strip())
-        elif cons_kw.search(s) and not pros_kw.search(s):
-            cons.append(s.strip())
-    
-    return pros[:8], cons[:8]
+# serve.py clears this until a freshly forked worker has warmed up
+_ready = threading.Event()
+_ready.set()
 
 
-def _detect_stakeholders(text: str):
-    civic_terms = [
-        'Residents', 'Students', 'Teachers', 'Parents', 'Small Businesses', 'Nonprofits',
-        'City Council', 'County Board', 'State Agencies', 'Vendors', 'Taxpayers'
-    ]
-    
-    found = []
-    
-    for term in civic_terms:
-        if re.search(rf"\b{re.escape(term)}\b", text):
-            found.append({'name': term, 'role': 'Stakeholder'})
-    
-    # also look for capitalized names
-    caps = re.findall(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\b", text)
-    
-    for c in caps[:5]:
-        if not any(s['name'] == c for s in found):
-            found.append({'name': c, 'role': 'Mentioned'})
-    
-    return found[:8]
+def set_ready(ready: bool) -> None:
+    if ready:
+        _ready.set()
+    else:
+        _ready.clear()
 
 
-def _detect_deadline(s: str):
-    m = re.search(r"\bby\s+([A-Z][a-z]+\s+\d{1,2})\b", s)
-    if m:
-        return m.group(1)
-    
-    m = re.search(r"\bdue\s+(\d{1,2}/\d{1,2}(?:/\d{2,4})?)\b", s, re.I)
-    if m:
-        return m.group(1)
-    
-    return None
+# load the model in the background at startup instead of on the first
+# /analyze call
+if os.environ.get('PLAINSPEAK_SUMMARIZER_WARMUP', '0') == '1':
+    threading.Thread(target=get_summarizer().warmup, name='summarizer-warmup', daemon=True).start()
+
 
 def _ocr_image_to_lines(img):
     if pytesseract is None or TessOutput is None:
         raise RuntimeError('Install Tesseract and pytesseract.')
     
-    data = pytesseract.image_to_data(img, output_type=TessOutput.DICT)
-    n = len(data.get('text', []))
-    by_line = {}
-    for i in range(n):
-        txt = (data['text'][i] or '').strip()
-        if not txt:
-            continue
-        if int(data.get('conf', ['-1'])[i]) < 0:
-            continue
-
-        key = (data.get('block_num', [0])[i], data.get('line_num', [0])[i])
-        left = data.get('left', [0])[i]
-        top = data.get('top', [0])[i]
-        width = data.get('width', [0])[i]
-        height = data.get('height', [0])[i]
-        
-        entry = by_line.get(key)
-        
-        if entry is None:
-            entry = {'words': [], 'x1': left, 'y1': top, 'x2': left+width, 'y2': top+height}
-        else:
-            entry['x1'] = min(entry['x1'], left)
-            entry['y1'] = min(entry['y1'], top)
-            entry['x2'] = max(entry['x2'], left+width)
-            entry['y2'] = max(entry['y2'], top+height)
-        entry['words'].append(txt)
-        by_line[key] = entry
-    
-    lines = []
-    for _, v in by_line.items():
-        text_line = ' '.join(v['words']).strip()
-        lines.append({
-            'text': text_line, 
-            'x': int(v['x1']), 
-            'y': int(v['y1']), 
-            'w': int(v['x2']-v['x1']), 
-            'h': int(v['y2']-v['y1'])
-        })
-    lines.sort(key=lambda d: (d['y'], d['x']))
-    full_text = '\n'.join(l['text'] for l in lines if l['text'])
+    with span('tesseract'):
+        data = pytesseract.image_to_data(img, output_type=TessOutput.DICT)
+    with span('ocr_lines'):
+        lines, full_text = assemble_lines(data)
     return lines, full_text, {'w': img.width, 'h': img.height}
 
 
+def _ocr_engine_version() -> str:
+    global _tesseract_version
+    if _tesseract_version is None:
+        try:
+            _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception:
+            _tesseract_version = 'unknown'
+    return _tesseract_version
+
+
+def _ocr_cache_key(prepared) -> str:
+    return ResultCache.key('ocr', prepared.pixel_hash, prepared.original_size, _ocr_engine_version())
+
+
+def _ocr_cached(prepared):
+    hit = _ocr_cache.get(_ocr_cache_key(prepared))
+    if hit is None:
+        return None
+    return hit['lines'], hit['full_text'], hit['image_size']
+
+
+def _ocr_uncached(prepared):
+    lines, full_text, _ = _ocr_image_to_lines(prepared.image)
+    return _ocr_store(prepared, lines, full_text)
+
+
+def _ocr_store(prepared, lines: list, full_text: str):
+    # ocr runs on the reduced image; boxes and size go back to the
+    # original's coordinates so clients can draw them on what they uploaded
+    lines = prepared.rescale_lines(lines)
+    _ocr_cache.set(_ocr_cache_key(prepared), {
+        'lines': lines,
+        'full_text': full_text,
+        'image_size': prepared.size_dict,
+    })
+    return lines, full_text, prepared.size_dict
+
+
+def _ocr_prepared(prepared):
+    cached = _ocr_cached(prepared)
+    if cached is not None:
+        return cached
+    return _ocr_uncached(prepared)
+
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     data = request.get_json(force=True, silent=True) or {}
@@ -254,49 +211,41 @@ def analyze():
     if not text and not urls:
         return jsonify({'error': 'No text or urls provided'}), 400
 
+    doc = Document(text)
+
+    # compact=1 points each item at the top-level sources list by id
+    # instead of repeating the source in every one of them
+    if _compact_requested():
+        item_sources = {'source_ids': ['src1' if urls else 'doc']}
+    else:
+        item_sources = {'sources': [{'title': 'Document', 'url': urls[0] if urls else None}]}
+
     summary_text = ''
+    summary_timing = None
     if text:
-        summarizer = get_summarizer()
-        try:
-            sm = summarizer(text, max_length=160, min_length=40, do_sample=False)
-            summary_text = sm[0]['summary_text']
-        except Exception:
-            summary_text = text[:400] + ('...' if len(text) > 400 else '')
+        with span('summarize'):
+            summary_text, summary_timing = get_summarizer().summarize(text, max_length=160, min_length=40)
 
     bullets = []
     for s in _split_sentences(summary_text)[:6]:
-        bullets.append({
-            'text': s.strip(), 
-            'sources': [{'title': 'Document', 'url': urls[0] if urls else None}]
-        })
+        bullets.append(dict(item_sources, text=s.strip()))
 
     pros = []
     cons = []
     
     if flags.get('pros_cons', True):
-        sents = _split_sentences(text)
-        pros, cons = _detect_pros_cons(sents)
-        pros = [
-            {'text': p, 'sources': [{'title': 'Document', 'url': urls[0] if urls else None}]} 
-            for p in pros
-        ]
-        cons = [
-            {'text': c, 'sources': [{'title': 'Document', 'url': urls[0] if urls else None}]} 
-            for c in cons
-        ]
+        pros, cons = _detect_pros_cons(doc)
+        pros = [dict(item_sources, text=p) for p in pros]
+        cons = [dict(item_sources, text=c) for c in cons]
 
     stakeholders = []
     if flags.get('stakeholders', True):
-        stakeholders = _detect_stakeholders(text)
+        stakeholders = _detect_stakeholders(doc)
 
     actions = []
     if flags.get('actions', True):
-        for a in extract_actions(text):
-            actions.append({
-                'text': a,
-                'due': _detect_deadline(a),
-                'sources': [{'title': 'Document', 'url': urls[0] if urls else None}],
-            })
+        for a, due in extract_action_items(doc):
+            actions.append(dict(item_sources, text=a, due=due))
 
     contradictions = []
 
@@ -307,7 +256,7 @@ def analyze():
     else:
         sources.append({'id': 'doc', 'title': 'Document', 'url': None})
 
-    return jsonify({
+    resp = jsonify({
         'summary': summary_text,
         'bullets': bullets,
         'pros': pros,
@@ -318,46 +267,240 @@ def analyze():
         'sources': sources,
         'ts': int(time.time()),
     })
+    if summary_timing is not None:
+        resp.headers['X-Summary-Engine'] = summary_timing['engine']
+        resp.headers['X-Summary-Time-Ms'] = str(summary_timing['summary_ms'])
+        resp.headers['X-Summary-Batch-Size'] = str(summary_timing['batch_size'])
+    return resp
 
 
 @app.route('/ocr_simplify', methods=['POST'])
 @app.route('/analyze_image', methods=['POST'])
 def ocr_simplify():
+    error, pages, prepared = _load_upload()
+    if error is not None:
+        return error
+
+    # multi-page tiffs and pdfs stream one result per page as it finishes
+    if pages is not None:
+        if request.args.get('async') in ('1', 'true'):
+            return jsonify({'error': 'async mode takes single images; multi-page uploads are streamed'}), 400
+        return _ocr_pages_response(pages)
+
+    # async=1 hands back a job id right away; the OCR runs on the same pool
+    if request.args.get('async') in ('1', 'true'):
+        return _submit_ocr_job(prepared)
+
+    # repeat uploads of the same picture skip the pool and tesseract entirely
+    with span('ocr_cache_lookup'):
+        cached = _ocr_cached(prepared)
+    if cached is not None:
+        resp = jsonify(_ocr_result_payload(*cached, compact=_compact_requested()))
+        resp.headers['X-OCR-Cache'] = 'hit'
+        return resp
+
+    try:
+        (lines, full_text, img_size), ocr_timing = _ocr_pool.run(_ocr_uncached, prepared)
+    except OCRQueueFull as e:
+        return _ocr_busy(e)
+    except Exception as e:
+        return jsonify({'error': 'ocr failed: ' + str(e)}), 500
+    metrics.record('ocr_queue_wait', ocr_timing['wait_ms'] / 1000)
+
+    resp = jsonify(_ocr_result_payload(lines, full_text, img_size, compact=_compact_requested()))
+    # queue wait and tesseract time separately, so the pool can be sized
+    resp.headers['X-OCR-Cache'] = 'miss'
+    resp.headers['X-OCR-Queue-Wait-Ms'] = str(ocr_timing['wait_ms'])
+    resp.headers['X-OCR-Time-Ms'] = str(ocr_timing['ocr_ms'])
+    return resp
+
+
+def _load_upload():
+    # (error response, pages, prepared): pages for multi-page uploads,
+    # prepared for a single image, or an error response to send back
     if 'image' not in request.files:
-        return jsonify({'error': 'No image provided'}), 400
+        return (jsonify({'error': 'No image provided'}), 400), None, None
     
     file = request.files['image']
     
     try:
-        content = file.read()
+        upload = upload_file(file.stream)
+        head = upload.read(5)
+        upload.seek(0)
         
-        if not content:
-            return jsonify({'error': 'Empty image'}), 400
+        if not head:
+            return (jsonify({'error': 'Empty image'}), 400), None, None
         if Image is None:
-            return jsonify({'error': 'PIL not available on server'}), 500
+            return (jsonify({'error': 'PIL not available on server'}), 500), None, None
         
-        img = Image.open(BytesIO(content)).convert('RGB')
+        if is_pdf(head):
+            if not pdf_rasterizer_available():
+                return (jsonify({'error': 'PDF uploads are not supported on this server'}), 415), None, None
+            return None, iter_pdf_pages(upload, max_pages=OCR_MAX_PAGES), None
+
+        with span('image_decode'):
+            img = Image.open(upload)
+            check_pixel_budget(img)
+            # only tiff frames are pages; an mpo (phone camera jpeg) or an
+            # animated gif/png is one picture, read from its first frame
+            if img.format == 'TIFF' and frame_count(img) > 1:
+                return None, iter_frames(img), None
+            prepared = prepare_image(img)
+        upload.close()
+        return None, None, prepared
     
+    except ImageTooLarge as e:
+        return (jsonify({'error': 'Image too large: ' + str(e)}), 413), None, None
+    except Exception:
+        return (jsonify({'error': 'Could not read image'}), 400), None, None
+
+
+def _ocr_pages_response(pages):
+    pages = iter(pages)
+    try:
+        first = next(pages, None)
+    except ImageTooLarge as e:
+        return jsonify({'error': 'Image too large: ' + str(e)}), 413
     except Exception:
         return jsonify({'error': 'Could not read image'}), 400
+    if first is None:
+        return jsonify({'error': 'Empty image'}), 400
 
+    # only the first page decides between 429 and a stream; later pages
+    # wait for room in the pool instead of failing halfway through
     try:
-        lines, full_text, img_size = _ocr_image_to_lines(img)
-    except Exception as e:
-        return jsonify({'error': 'ocr failed: ' + str(e)}), 500
+        first_future = _ocr_pool.submit(_ocr_prepared, first)
+    except OCRQueueFull as e:
+        return _ocr_busy(e)
 
-    simplified_text = simplify_text_rule_based(full_text) if full_text else "No text found"
-    actions = extract_actions(full_text)
-    
-    # find action items in the image
-    cue = re.compile(
-        r"\b(must|should|need to|required|please|due|submit|pay|complete|bring|provide|sign)\b", 
-        re.I
-    )
+    compact = _compact_requested()
+
+    def line(obj):
+        return fastjson.dumps(obj).decode('utf-8') + '\n'
+
+    def generate():
+        pending = {first_future: 0}
+        texts = {}
+        submitted = 1
+        waiting = None
+        exhausted = False
+        truncated = False
+
+        while True:
+            # keep at most one page per worker in flight for this document
+            while not exhausted and len(pending) < _ocr_pool.workers:
+                if waiting is None:
+                    if submitted >= OCR_MAX_PAGES:
+                        exhausted = True
+                        try:
+                            truncated = next(pages, None) is not None
+                        except Exception:
+                            # there is a next page, it just can't be read
+                            truncated = True
+                        break
+                    try:
+                        waiting = next(pages, None)
+                    except Exception as e:
+                        # a page that can't be read (or is over the pixel
+                        # budget) ends the document; say so instead of
+                        # stopping short without a word
+                        waiting = None
+                        yield line({'type': 'page', 'page': submitted + 1, 'error': 'could not read page: ' + str(e)})
+                    if waiting is None:
+                        exhausted = True
+                        break
+                try:
+                    future = _ocr_pool.submit(_ocr_prepared, waiting)
+                except OCRQueueFull as e:
+                    if pending:
+                        break
+                    time.sleep(min(e.retry_after, 1))
+                    continue
+                pending[future] = submitted
+                submitted += 1
+                waiting = None
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    (lines, page_text, img_size), timing = future.result()
+                except Exception as e:
+                    yield line({'type': 'page', 'page': index + 1, 'error': 'ocr failed: ' + str(e)})
+                    continue
+                texts[index] = page_text
+                yield line({
+                    'type': 'page',
+                    'page': index + 1,
+                    'text': page_text,
+                    'image_size': img_size,
+                    'boxes': lines,
+                    'action_boxes': _action_boxes(lines),
+                    'ocr_ms': timing['ocr_ms'],
+                })
+
+        full_text = '\n'.join(texts[i] for i in sorted(texts) if texts[i])
+        done = {
+            'type': 'done',
+            'pages': submitted,
+            'truncated': truncated,
+            'extracted_text': full_text,
+            'full_text': full_text,
+            'simplified_text': simplify_text_rule_based(full_text) if full_text else "No text found",
+            'actions': extract_actions(full_text),
+        }
+        if compact:
+            del done['extracted_text']
+        yield line(done)
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+def _ocr_busy(e):
+    # e is OCRQueueFull or JobTableFull, both carry retry_after
+    resp = jsonify({'error': 'ocr is busy, try again shortly'})
+    resp.headers['Retry-After'] = str(e.retry_after)
+    return resp, 429
+
+
+def _compact_requested() -> bool:
+    return request.args.get('compact') in ('1', 'true')
+
+
+def _ocr_result_payload(lines: list, full_text: str, img_size: dict, compact: bool = False) -> dict:
+    doc = Document(full_text)
+    with span('sentence_split'):
+        doc.sentences  # split here so the later stages share it
+    with span('simplify'):
+        simplified_text = (_join_simplified(simplify_sentences(doc)) or full_text[:200]) if full_text else "No text found"
+    with span('actions'):
+        actions = extract_actions(doc)
+        action_boxes = _action_boxes(lines)
+
+    payload = {
+        'extracted_text': full_text,
+        'simplified_text': simplified_text,
+        'actions': actions,
+        'full_text': full_text,
+        'image_size': img_size,
+        'boxes': lines,
+        'action_boxes': action_boxes,
+    }
+    if compact:
+        # extracted_text is the older name for full_text
+        del payload['extracted_text']
+    return payload
+
+
+def _action_boxes(lines: list) -> list:
+    # find action items in the image, with the same labels the text uses
     action_boxes = []
     
     for ln in lines:
-        if cue.search(ln['text']):
+        if ACTION in classify(ln['text']):
             action_boxes.append({
                 'text': ln['text'], 
                 'x': ln['x'], 
@@ -365,71 +508,405 @@ def ocr_simplify():
                 'w': ln['w'], 
                 'h': ln['h']
             })
+    
+    return action_boxes
+
+
+def _submit_ocr_job(prepared):
+    try:
+        job = _jobs.create('ocr')
+    except JobTableFull as e:
+        return _ocr_busy(e)
+    try:
+        future = _ocr_pool.submit(_ocr_prepared, prepared, on_start=lambda: _jobs.mark_running(job))
+    except OCRQueueFull as e:
+        _jobs.discard(job)
+        return _ocr_busy(e)
+
+    def finish(f):
+        try:
+            (lines, full_text, img_size), _ = f.result()
+            _jobs.finish(job, _ocr_result_payload(lines, full_text, img_size))
+        except Exception as e:
+            _jobs.fail(job, 'ocr failed: ' + str(e))
+
+    future.add_done_callback(finish)
 
     return jsonify({
-        'extracted_text': full_text,
-        'simplified_text': simplified_text,
-        'actions': actions,
-        'full_text': full_text,
-        'image_size': img_size,
-        'boxes': lines,
-        'action_boxes': action_boxes,
-    })
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/jobs/{job.id}',
+        'events_url': f'/jobs/{job.id}/events',
+    }), 202
+
+
+def _build_simplify_response(text_to_simplify: str, target_grade, target_lang) -> tuple:
+    response, state = _simplify_untranslated(text_to_simplify, target_grade, target_lang)
+    _translate_response(response, target_lang)
+    return response, state
+
+
+def _translate_response(response: dict, target_lang) -> None:
+    # translate if language is selected
+    if target_lang and _translation_memory is not None:
+        try:
+            with span('translation'):
+                response['translated_text'] = _translation_memory.translate(response['simplified_text'], dest=target_lang)
+        except Exception:
+            response['translated_text'] = None
+
+
+def _state_response(state: SimplifyState, target_lang) -> dict:
+    return {
+        'original_text': state.text,
+        'simplification_type': 'extraction',
+        'translated_text': None,
+        'target_lang': target_lang,
+        'target_grade': state.target_grade,
+        **state.result(),
+    }
+
+
+def _simplify_untranslated(text_to_simplify: str, target_grade, target_lang) -> tuple:
+    # (response, state): everything but the translation, which is the only
+    # part that waits on the network. The state lets a later edit of this
+    # text be redone sentence by sentence.
+    state = SimplifyState.build(text_to_simplify, target_grade)
+    return _state_response(state, target_lang), state
+
+
+def _simplify_edit(text_to_simplify: str, target_grade, target_lang, base_id) -> tuple:
+    # (response, state, changed sentences, base response) for an edit of a
+    # result this worker still holds, else None and the caller does the
+    # whole text. Untranslated unless the simplified text came out the same.
+    base = _edit_states.get(base_id) if isinstance(base_id, str) else None
+    if base is None:
+        return None
+    base_state, base_response = base
+    if base_state.target_grade != target_grade or base_response['target_lang'] != target_lang:
+        return None
+
+    with span('incremental'):
+        state, changed = base_state.edit(text_to_simplify)
+    response = _state_response(state, target_lang)
+    if response['simplified_text'] == base_response['simplified_text']:
+        response['translated_text'] = base_response['translated_text']
+    return response, state, changed, base_response
+
+
+def _simplify_patch(text_to_simplify: str, base_id: str, edit: tuple) -> dict:
+    # the reply to an edit: a merge patch against the base result instead of
+    # the whole response, which would echo the whole text back. Actions go
+    # as a splice, since a merge patch can only replace a list whole, and
+    # fields that became null (translated_text, an unscorable grade) are
+    # listed as paths in nulls, since null in a merge patch means delete.
+    response, state, changed, base_response = edit
+    response['result_id'] = ResultCache.key(text_to_simplify, state.target_grade, response['target_lang'], ENGINE_VERSION)
+    _edit_states.put(response['result_id'], state, response)
+    _simplify_history(text_to_simplify, response)
+    nulls = []
+    out = {
+        'result_id': response['result_id'],
+        'base_result_id': base_id,
+        'patch': merge_patch(base_response, response, skip=('original_text', 'result_id', 'actions'), nulls=nulls),
+        'changed_sentences': changed,
+    }
+    if nulls:
+        out['nulls'] = nulls
+    if response['actions'] != base_response['actions']:
+        out['actions_splice'] = list_splice(base_response['actions'], response['actions'])
+    return out
+
+
+def _simplify_params() -> tuple:
+    data = request.get_json(force=True, silent=True) or {}
+    return data.get('text', ''), data.get('target_grade', 8), data.get('target_lang'), data.get('previous_result_id')
+
+
+def _simplify_lookup(text_to_simplify: str, target_grade, target_lang) -> tuple:
+    # (cache key, cached response or None); cached responses already carry
+    # their translation, so hits skip it
+    with span('cache_lookup'):
+        cache_key = ResultCache.key(text_to_simplify, target_grade, target_lang, ENGINE_VERSION)
+        return cache_key, _result_cache.get(cache_key)
+
+
+def _simplify_finish(text_to_simplify: str, target_lang, cache_key: str, response: dict, fresh: bool, state=None) -> None:
+    # the cache key doubles as the result id a client sends back with an edit
+    response['result_id'] = cache_key
+    if fresh:
+        translation_failed = target_lang and _translation_memory is not None and response['translated_text'] is None
+        if not translation_failed:
+            with span('cache_store'):
+                _result_cache.set(cache_key, response)
+    if state is not None:
+        _edit_states.put(cache_key, state, response)
+    _simplify_history(text_to_simplify, response)
+
+
+def _simplify_history(text_to_simplify: str, response: dict) -> None:
+    with span('history'):
+        _history.add({
+            'timestamp': datetime.now().isoformat(),
+            'original_text': text_to_simplify[:200] + ('...' if len(text_to_simplify) > 200 else ''),
+            'simplified_text': response['simplified_text'],
+            'actions': response['actions'],
+            'type': 'text'
+        })
 
 
 @app.route('/simplify', methods=['POST'])
 def simplify_endpoint():
     try:
-        data = request.get_json(force=True, silent=True) or {}
-        text_to_simplify = data.get('text', '')
-        target_lang = data.get('target_lang')
-        target_grade = data.get('target_grade', 8)
+        text_to_simplify, target_grade, target_lang, base_id = _simplify_params()
 
         if not text_to_simplify:
             return jsonify({'error': 'No text provided'}), 400
 
-        simplified_text = simplify_text_rule_based(text_to_simplify, target_grade)
-        actions = extract_actions(text_to_simplify)
+        # an edit of an earlier result: redo the changed sentences, send a patch
+        edit = _simplify_edit(text_to_simplify, target_grade, target_lang, base_id) if base_id else None
+        if edit is not None:
+            if edit[0]['translated_text'] is None:
+                _translate_response(edit[0], target_lang)
+            return jsonify(_simplify_patch(text_to_simplify, base_id, edit))
+
+        cache_key, response = _simplify_lookup(text_to_simplify, target_grade, target_lang)
+        state = None
+        fresh = response is None
+        if fresh:
+            response, state = _build_simplify_response(text_to_simplify, target_grade, target_lang)
+
+        _simplify_finish(text_to_simplify, target_lang, cache_key, response, fresh, state)
+
+        return jsonify(response)
+    
+    except Exception as e:
+        print("error in /simplify: " + str(e))
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'server error: ' + str(e)}), 500
+
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_request_text(stream, chunk_size: int = STREAM_CHUNK_BYTES):
+    # decode the body as it arrives; the incremental decoder holds on to a
+    # multi-byte character that gets split across two reads
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+@app.route('/simplify_stream', methods=['POST'])
+def simplify_stream():
+    # raw text body, options in the query string, NDJSON out, so neither the
+    # request nor the response is ever held in memory as a whole
+    target_lang = request.args.get('target_lang') or None
+    target_grade = request.args.get('target_grade', default=8, type=int)
+    num_sentences, simplify_vocab, max_words_per_sentence = _grade_settings(target_grade)
+
+    def line(obj):
+        return fastjson.dumps(obj).decode('utf-8') + '\n'
+
+    def generate():
+        simplified_sentences = []
+        seen_actions = set()
+        actions_count = 0
+        history_actions = []
+        words_before = 0
+        preview = ''
+        before = ReadabilityTally()
+        after = ReadabilityTally()
+
+        for i, sentence in enumerate(iter_sentences(_iter_request_text(request.stream))):
+            words_before += len(sentence.split())
+            before.add(sentence)
+            if len(preview) <= 200:
+                preview = (preview + ' ' + sentence).strip()[:201]
+
+            if i < num_sentences:
+                simplified_sentence = _simplify_sentence(sentence, simplify_vocab, max_words_per_sentence)
+                if simplified_sentence is not None:
+                    simplified_sentences.append(simplified_sentence)
+                    after.add(simplified_sentence)
+                    yield line({'type': 'sentence', 'index': i, 'text': simplified_sentence})
+
+            a = _action_text(sentence)
+            if a is not None and a.lower() not in seen_actions:
+                seen_actions.add(a.lower())
+                actions_count += 1
+                if len(history_actions) < 20:
+                    history_actions.append(a)
+                yield line({'type': 'action', 'text': a})
+
+        if not words_before:
+            yield line({'type': 'error', 'error': 'No text provided'})
+            return
+
+        simplified_text = _join_simplified(simplified_sentences) or preview[:200]
+        if not simplified_sentences:
+            after.add(simplified_text)
 
         translated = None
-        
-        # translate if language is selected
-        if target_lang and _translator is not None:
+        if target_lang and _translation_memory is not None:
             try:
-                translated = _translator.translate(simplified_text, dest=target_lang).text
+                translated = _translation_memory.translate(simplified_text, dest=target_lang)
             except Exception:
                 translated = None
 
-        response = {
-            'original_text': text_to_simplify,
+        _history.add({
+            'timestamp': datetime.now().isoformat(),
+            'original_text': preview[:200] + ('...' if len(preview) > 200 else ''),
+            'simplified_text': simplified_text,
+            'actions': history_actions,
+            'type': 'text'
+        })
+
+        yield line({
+            'type': 'done',
             'simplified_text': simplified_text,
             'simplification_type': 'extraction',
-            'actions': actions,
+            'actions_count': actions_count,
             'translated_text': translated,
             'target_lang': target_lang,
             'target_grade': target_grade,
-            'readability': {
-                'before': len(text_to_simplify.split()),
-                'after': len(simplified_text.split())
-            }
-        }
-
-        _history.append({
-            'id': len(_history) + 1,
-            'timestamp': datetime.now().isoformat(),
-            'original_text': text_to_simplify[:200] + ('...' if len(text_to_simplify) > 200 else ''),
-            'simplified_text': simplified_text,
-            'actions': actions,
-            'type': 'text'
+            'readability': tally_report(before, after, target_grade),
         })
 
-        return jsonify(response)
-    
-    except Exception as e:
-        print("error in /simplify: " + str(e))
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': 'server error: ' + str(e)}), 500
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/simplify/batch', methods=['POST'])
+def simplify_batch_endpoint():
+    data = request.get_json(force=True, silent=True) or {}
+    documents = data.get('documents')
+    target_grade = data.get('target_grade', 8)
+
+    if not isinstance(documents, list) or not documents:
+        return jsonify({'error': 'No documents provided'}), 400
+    if len(documents) > BATCH_MAX_DOCUMENTS:
+        return jsonify({'error': f'Too many documents (max {BATCH_MAX_DOCUMENTS})'}), 400
+
+    results = simplify_batch(documents, target_grade)
+    failed = sum(1 for r in results if 'error' in r)
+
+    return jsonify({
+        'results': results,
+        'count': len(results),
+        'failed': failed,
+        'target_grade': target_grade,
+    })
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+
+    def generate():
+        seen = None
+        while True:
+            if job.version != seen:
+                seen = job.version
+                state = job.to_dict()
+                event = 'done' if job.is_finished else 'status'
+                yield f"event: {event}\ndata: {fastjson.dumps(state).decode('utf-8')}\n\n"
+                if job.is_finished:
+                    return
+            # comment line keeps proxies from closing an idle stream
+            if not _jobs.wait(job, seen, timeout=JOB_KEEPALIVE_SECONDS):
+                yield ': keepalive\n\n'
+
+    resp = Response(generate(), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+@app.before_request
+def _start_request_timings():
+    if metrics.METRICS_ENABLED:
+        # uploads also get their peak memory tracked
+        metrics.begin_request(watch_rss=request.mimetype == 'multipart/form-data')
+
+
+@app.after_request
+def _finish_request_timings(response):
+    timings = metrics.current_request()
+    if timings is None or timings.closed:
+        return response
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    elapsed = metrics.end_request(timings, route, response.status_code)
+    if metrics.SERVER_TIMING:
+        response.headers['Server-Timing'] = timings.header(elapsed)
+    if timings.peak_rss is not None:
+        response.headers['X-Peak-RSS-KB'] = str(timings.peak_rss // 1024)
+    return response
+
+
+@app.after_request
+def _compress(response):
+    # registered after the timings hook so it runs before it and its time
+    # lands in the request's stages
+    return compress_response(response, request.accept_encodings)
+
+
+@app.teardown_request
+def _end_rss_watch(exc):
+    # after_request doesn't run if the response couldn't be built
+    metrics.end_rss_watch(metrics.current_request())
+
+
+@app.errorhandler(413)
+def _body_too_large(e):
+    limit = app.config['MAX_CONTENT_LENGTH']
+    return jsonify({'error': f'Request body too large (max {limit // (1024 * 1024)} MB)'}), 413
+
+
+@app.before_request
+def _check_body_size():
+    # the handlers catch everything they raise, so turn away bodies that
+    # say they're too big before a handler starts reading
+    limit = app.config['MAX_CONTENT_LENGTH']
+    if limit is not None and request.content_length is not None and request.content_length > limit:
+        return _body_too_large(None)
+
+
+metrics.REGISTRY.collect(
+    'plainspeak_cache_hits_total', 'Cache hits.', 'counter', ('cache',),
+    lambda: {(name,): c.stats()['hits'] for name, c in (('simplify', _result_cache), ('ocr', _ocr_cache))},
+)
+metrics.REGISTRY.collect(
+    'plainspeak_cache_misses_total', 'Cache misses.', 'counter', ('cache',),
+    lambda: {(name,): c.stats()['misses'] for name, c in (('simplify', _result_cache), ('ocr', _ocr_cache))},
+)
+metrics.REGISTRY.collect(
+    'plainspeak_ocr_jobs', 'OCR jobs running or waiting in the pool.', 'gauge', ('state',),
+    lambda: {(state,): _ocr_pool.stats()[state] for state in ('running', 'queued')},
+)
+metrics.REGISTRY.collect(
+    'plainspeak_ocr_rejected_total', 'OCR requests turned away with 429.', 'counter', (),
+    lambda: {(): _ocr_pool.stats()['rejected']},
+)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 
 @app.route('/health', methods=['GET'])
@@ -437,9 +914,43 @@ def health():
     return jsonify({'status': 'ok'}), 200
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # per worker: a load balancer only sends traffic once this says 200
+    is_ready = _ready.is_set()
+    return jsonify({'ready': is_ready, 'pid': os.getpid()}), 200 if is_ready else 503
+
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'engine_version': ENGINE_VERSION,
+        'simplify': _result_cache.stats(),
+        'ocr': _ocr_cache.stats(),
+        'translation': _translation_memory.stats() if _translation_memory is not None else None,
+        'sentences': sentence_memo_stats(),
+        'edit_states': _edit_states.stats(),
+    })
+
+
+@app.route('/ocr_stats', methods=['GET'])
+def ocr_stats():
+    return jsonify(_ocr_pool.stats())
+
+
+@app.route('/summarizer_stats', methods=['GET'])
+def summarizer_stats():
+    return jsonify(get_summarizer().stats())
+
+
 @app.route('/history', methods=['GET'])
 def get_history():
-    return jsonify({'items': list(reversed(_history))})
+    cursor = request.args.get('cursor', type=int)
+    limit = request.args.get('limit', default=50, type=int)
+    limit = max(1, min(limit, 200))
+
+    items, next_cursor = _history.page(cursor=cursor, limit=limit)
+    return jsonify({'items': items, 'next_cursor': next_cursor})
 
 
 @app.route('/sources', methods=['POST'])
@@ -0,0 +1,428 @@
+# asyncio entry point for app.py, as a plain ASGI app
+#
+# /simplify, /ocr_simplify and /analyze_image run natively on the event
+# loop: translation awaits the translator, tesseract runs as an asyncio
+# subprocess and the rule-based steps go to a small thread pool, so a
+# request waiting on the network or on OCR holds no thread. Everything
+# else (and the streamed or async=1 OCR variants) goes to the Flask app on
+# a thread pool. Responses, headers and metrics are the Flask handlers'.
+#
+#   python asgi.py [--host H] [--port P]      (needs uvicorn)
+#   uvicorn asgi:app --port 5003
+
+import argparse
+import asyncio
+import contextvars
+import io
+import os
+import sys
+import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from flask import jsonify, request
+
+try:
+    import uvicorn
+except Exception:
+    uvicorn = None
+
+import app as backend
+import metrics
+from metrics import span
+from imaging import UPLOAD_SPOOL_BYTES
+from ocr_lines import assemble_lines, parse_tsv
+from ocr_pool import OCRQueueFull
+
+# threads for the rule-based steps; they hold the GIL, so more than the
+# core count buys nothing
+CPU_THREADS = int(os.environ.get('PLAINSPEAK_ASGI_CPU_THREADS', '0')) or (os.cpu_count() or 1)
+# threads for the routes served by the Flask app
+WSGI_THREADS = int(os.environ.get('PLAINSPEAK_ASGI_WSGI_THREADS', '16'))
+TESSERACT_CMD = os.environ.get('PLAINSPEAK_TESSERACT_CMD') or (
+    backend.pytesseract.pytesseract.tesseract_cmd if backend.pytesseract is not None else 'tesseract')
+
+
+# routes that read their body as it arrives instead of all at once
+STREAMED_BODY_ROUTES = {('POST', '/simplify_stream')}
+
+
+async def _in_thread(executor, fn, *args, context=None):
+    # run in the caller's context, so the request and its stage timings
+    # follow fn onto the thread. Steps of one response body share a single
+    # context: stream_with_context pushes the request context on the first
+    # next() and pops it on the last, and both have to see the same one.
+    loop = asyncio.get_running_loop()
+    if context is None:
+        context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, context.run, fn, *args)
+
+
+class _BodyStream(io.RawIOBase):
+    # wsgi.input that pulls the request body from the ASGI receive channel
+    # as the app reads it, from whichever worker thread is reading
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buf = b''
+        self._more = True
+        self.disconnected = False
+        self.done = asyncio.Event()
+
+    def readable(self):
+        return True
+
+    def _pull(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            self.disconnected = True
+            self._more = False
+        else:
+            self._buf += message.get('body', b'')
+            self._more = message.get('more_body', False)
+        if not self._more:
+            self._loop.call_soon_threadsafe(self.done.set)
+
+    def readinto(self, b):
+        while not self._buf and self._more:
+            self._pull()
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+async def tesseract_tsv(png: bytes) -> dict:
+    # image_to_data without pytesseract's temp files: the image goes in on
+    # stdin and the tsv comes back on stdout
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            TESSERACT_CMD, 'stdin', 'stdout', '-l', 'eng', '-c', 'tessedit_create_tsv=1', 'tsv',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("tesseract is not installed or it's not in your PATH")
+    out, err = await proc.communicate(png)
+    if proc.returncode != 0:
+        raise RuntimeError(err.decode('utf-8', 'replace').strip() or f'tesseract exited with {proc.returncode}')
+    return parse_tsv(out.decode('utf-8', 'replace'))
+
+
+def _encode_png(img) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class PlainSpeakASGI:
+    def __init__(self, flask_app, cpu_threads: int = CPU_THREADS, wsgi_threads: int = WSGI_THREADS):
+        self.flask_app = flask_app
+        self._cpu = ThreadPoolExecutor(max_workers=max(1, cpu_threads), thread_name_prefix='asgi-cpu')
+        self._wsgi = ThreadPoolExecutor(max_workers=max(1, wsgi_threads), thread_name_prefix='asgi-wsgi')
+        # the Flask side's pool, so async jobs, page streams and native
+        # requests all count against one PLAINSPEAK_OCR_WORKERS budget
+        self.ocr = backend._ocr_pool
+        self.routes = {
+            ('POST', '/simplify'): self.simplify,
+            ('POST', '/ocr_simplify'): self.ocr_simplify,
+            ('POST', '/analyze_image'): self.ocr_simplify,
+        }
+
+    def cpu(self, fn, *args):
+        return _in_thread(self._cpu, fn, *args)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        route = (scope['method'], scope['path'])
+        stream = None
+        if route in STREAMED_BODY_ROUTES:
+            stream = _BodyStream(receive, asyncio.get_running_loop())
+            body = stream, _declared_length(scope)
+        else:
+            body = await self._read_body(scope, receive)
+            if body is None:
+                return
+        environ = _environ(scope, *body)
+        handler = self.routes.get(route)
+        try:
+            if handler is None:
+                await self._serve_wsgi(environ, receive, send, stream)
+            else:
+                await self._serve_native(handler, environ, send)
+        finally:
+            body[0].close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._cpu.shutdown(wait=False)
+                self._wsgi.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, scope, receive):
+        # (file, length), spooled to disk past UPLOAD_SPOOL_BYTES; None if
+        # the client went away before sending it all. A body over the
+        # limit isn't read any further: the empty file and its claimed
+        # length get the Flask app's 413.
+        limit = self.flask_app.config['MAX_CONTENT_LENGTH']
+        declared = _declared_length(scope)
+        if declared is not None and limit is not None and declared > limit:
+            return BytesIO(), declared
+
+        body = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+        length = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            chunk = message.get('body', b'')
+            length += len(chunk)
+            if limit is not None and length > limit:
+                body.close()
+                return BytesIO(), length
+            body.write(chunk)
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body, length
+
+    async def _serve_native(self, handler, environ, send):
+        # the same request context, before/after hooks and error handling a
+        # Flask dispatch would give, around a coroutine view
+        app = self.flask_app
+        with app.request_context(environ):
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await handler()
+                response = app.process_response(app.make_response(rv))
+            except Exception as e:
+                response = app.make_response(app.handle_exception(e))
+
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': _headers(response.headers.to_wsgi_list()),
+            })
+            if response.is_streamed:
+                iterator = response.iter_encoded()
+                context = contextvars.copy_context()
+                try:
+                    while True:
+                        chunk = await _in_thread(self._wsgi, next, iterator, None, context=context)
+                        if chunk is None:
+                            break
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                finally:
+                    await _in_thread(self._wsgi, response.close, context=context)
+                await send({'type': 'http.response.body', 'body': b''})
+            else:
+                await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    async def _serve_wsgi(self, environ, receive, send, stream=None):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+            return _no_write
+
+        # one context for the call and every step of its body
+        context = contextvars.copy_context()
+        body = await _in_thread(self._wsgi, self.flask_app, environ, start_response, context=context)
+        # a streamed body (ndjson pages, job events) stops at the next chunk
+        # once the client hangs up
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive, stream))
+        iterator = iter(body)
+        try:
+            first = await _in_thread(self._wsgi, next, iterator, None, context=context)
+            await send({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': _headers(started['headers']),
+            })
+            chunk = first
+            while chunk is not None and not disconnected.done():
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await _in_thread(self._wsgi, next, iterator, None, context=context)
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            if hasattr(body, 'close'):
+                await _in_thread(self._wsgi, body.close, context=context)
+
+    async def simplify(self):
+        try:
+            text_to_simplify, target_grade, target_lang, base_id = await self.cpu(backend._simplify_params)
+
+            if not text_to_simplify:
+                return jsonify({'error': 'No text provided'}), 400
+
+            if base_id:
+                edit = await self.cpu(backend._simplify_edit, text_to_simplify, target_grade, target_lang, base_id)
+                if edit is not None:
+                    if edit[0]['translated_text'] is None:
+                        await self._translate(edit[0], target_lang)
+                    return jsonify(await self.cpu(backend._simplify_patch, text_to_simplify, base_id, edit))
+
+            cache_key, response = await self.cpu(backend._simplify_lookup, text_to_simplify, target_grade, target_lang)
+            state = None
+            fresh = response is None
+            if fresh:
+                response, state = await self.cpu(backend._simplify_untranslated, text_to_simplify, target_grade, target_lang)
+                await self._translate(response, target_lang)
+
+            await self.cpu(backend._simplify_finish, text_to_simplify, target_lang, cache_key, response, fresh, state)
+
+            return jsonify(response)
+
+        except Exception as e:
+            print(f"simplify error: {e}")
+            traceback.print_exc()
+            return jsonify({'error': f'server error: {str(e)}'}), 500
+
+    async def _translate(self, response: dict, target_lang) -> None:
+        if target_lang and backend._translation_memory is not None:
+            try:
+                with span('translation'):
+                    response['translated_text'] = await backend._translation_memory.atranslate(
+                        response['simplified_text'], dest=target_lang)
+            except Exception:
+                response['translated_text'] = None
+
+    async def ocr_simplify(self):
+        error, pages, prepared = await self.cpu(backend._load_upload)
+        if error is not None:
+            return error
+
+        # streamed pages and async jobs already run off the request thread
+        if pages is not None:
+            if request.args.get('async') in ('1', 'true'):
+                return jsonify({'error': 'async mode takes single images; multi-page uploads are streamed'}), 400
+            return await self.cpu(backend._ocr_pages_response, pages)
+        if request.args.get('async') in ('1', 'true'):
+            return await self.cpu(backend._submit_ocr_job, prepared)
+
+        with span('ocr_cache_lookup'):
+            cached = await self.cpu(backend._ocr_cached, prepared)
+        if cached is not None:
+            resp = jsonify(await self.cpu(backend._ocr_result_payload, *cached, backend._compact_requested()))
+            resp.headers['X-OCR-Cache'] = 'hit'
+            return resp
+
+        try:
+            (lines, full_text, img_size), ocr_timing = await self.ocr.arun(self._ocr_uncached, prepared)
+        except OCRQueueFull as e:
+            return backend._ocr_busy(e)
+        except Exception as e:
+            return jsonify({'error': 'ocr failed: ' + str(e)}), 500
+        metrics.record('ocr_queue_wait', ocr_timing['wait_ms'] / 1000)
+
+        resp = jsonify(await self.cpu(backend._ocr_result_payload, lines, full_text, img_size, backend._compact_requested()))
+        resp.headers['X-OCR-Cache'] = 'miss'
+        resp.headers['X-OCR-Queue-Wait-Ms'] = str(ocr_timing['wait_ms'])
+        resp.headers['X-OCR-Time-Ms'] = str(ocr_timing['ocr_ms'])
+        return resp
+
+    async def _ocr_uncached(self, prepared):
+        png = await self.cpu(_encode_png, prepared.image)
+        with span('tesseract'):
+            data = await tesseract_tsv(png)
+        with span('ocr_lines'):
+            lines, full_text = await self.cpu(assemble_lines, data)
+        return await self.cpu(backend._ocr_store, prepared, lines, full_text)
+
+
+def _no_write(data):
+    raise RuntimeError('write() is not supported, return an iterable')
+
+
+async def _wait_disconnect(receive, stream=None):
+    # a body still being streamed to the app owns receive until it's done
+    if stream is not None:
+        await stream.done.wait()
+        if stream.disconnected:
+            return
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _declared_length(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'content-length' and value.isdigit():
+            return int(value)
+    return None
+
+
+def _headers(pairs) -> list:
+    return [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in pairs]
+
+
+def _environ(scope, body, length) -> dict:
+    # length None for a body streamed through as it arrives
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if length is not None:
+        environ['CONTENT_LENGTH'] = str(length)
+    if isinstance(body, _BodyStream):
+        # we end the stream ourselves, so werkzeug may read it without a
+        # length (and applies MAX_CONTENT_LENGTH as it goes)
+        environ['wsgi.input_terminated'] = True
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+        environ['REMOTE_PORT'] = str(scope['client'][1])
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = name if name == 'CONTENT_TYPE' else 'HTTP_' + name
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+app = PlainSpeakASGI(backend.app)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '5003')))
+    args = parser.parse_args()
+    if uvicorn is None:
+        sys.exit('uvicorn is not installed: pip install uvicorn')
+    uvicorn.run(app, host=args.host, port=args.port, lifespan='on', log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from simplifier import extract_actions, simplify_text_rule_based
+
+BATCH_WORKERS = int(os.environ.get('PLAINSPEAK_BATCH_WORKERS', '0')) or (os.cpu_count() or 1)
+
+# below this many documents the pool costs more than it saves
+INLINE_BELOW = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def simplify_document(text: str, target_grade: int = 8) -> dict:
+    return {
+        'simplified_text': simplify_text_rule_based(text, target_grade),
+        'actions': extract_actions(text),
+    }
+
+
+def _run_one(job: tuple) -> dict:
+    # never raises, so one bad document can't take the rest of the batch down
+    text, target_grade = job
+    try:
+        if not isinstance(text, str) or not text:
+            raise ValueError('No text provided')
+        return simplify_document(text, int(target_grade))
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def simplify_batch(documents, target_grade: int = 8) -> list:
+    # documents are strings or {'text': ..., 'target_grade': ...} dicts;
+    # results come back in the same order, with 'error' set on failures
+    jobs = []
+    for d in documents:
+        if isinstance(d, dict):
+            jobs.append((d.get('text'), d.get('target_grade', target_grade)))
+        else:
+            jobs.append((d, target_grade))
+
+    if BATCH_WORKERS <= 1 or len(jobs) < INLINE_BELOW:
+        return [_run_one(j) for j in jobs]
+
+    chunksize = max(1, len(jobs) // (BATCH_WORKERS * 4))
+    try:
+        return list(get_pool().map(_run_one, jobs, chunksize=chunksize))
+    except BrokenProcessPool:
+        # a worker died (oom, killed); start fresh next time and finish inline
+        _reset_pool()
+        return [_run_one(j) for j in jobs]
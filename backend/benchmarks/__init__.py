@@ -0,0 +1 @@
+# benchmark scripts; run them from backend/, e.g. python benchmarks/suite.py
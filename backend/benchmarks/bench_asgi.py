@@ -0,0 +1,179 @@
+# concurrency test for the asyncio path: N /simplify requests with a
+# translation target arrive at once while the translator takes a fixed
+# time per call, first through asgi.app (in process, no sockets), then
+# through the Flask app on a thread pool of the given size. Reports wall
+# time, latency percentiles (from arrival, so queueing counts) and the
+# most threads alive at once.
+# usage: python benchmarks/bench_asgi.py [--requests N] [--latency-ms MS] [--threads N]
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-bench-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+
+import app as backend
+import asgi
+from translation_memory import TranslationMemory
+
+TEXT = ('Applicant {n} must submit the renewal form before March 3. '
+        'The fee is nonrefundable and late filings may be rejected.')
+
+
+class _Translated:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _translated(text):
+    # googletrans' shape: a result for a string, a list of them for a list
+    if isinstance(text, list):
+        return [_Translated(t) for t in text]
+    return _Translated(text)
+
+
+class SlowAsyncTranslator:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    async def translate(self, text, dest):
+        await asyncio.sleep(self.latency)
+        return _translated(text)
+
+
+class SlowTranslator:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def translate(self, text, dest):
+        time.sleep(self.latency)
+        return _translated(text)
+
+
+class ThreadPeak:
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _body(n: int) -> bytes:
+    # a fresh text per request, so neither cache answers for it
+    return json.dumps({'text': TEXT.format(n=n), 'target_grade': 5, 'target_lang': 'es'}).encode('utf-8')
+
+
+async def _asgi_request(app, body: bytes) -> tuple:
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+        'path': '/simplify', 'root_path': '', 'query_string': b'',
+        'headers': [(b'content-type', b'application/json')],
+        'server': ('bench', 80), 'client': ('127.0.0.1', 1),
+    }
+    sent = False
+    status = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0], time.perf_counter()
+
+
+def run_asgi(n: int, latency_ms: float) -> dict:
+    backend._translation_memory = TranslationMemory(SlowAsyncTranslator(latency_ms))
+    app = asgi.PlainSpeakASGI(backend.app)
+
+    async def all_at_once():
+        return await asyncio.gather(*[_asgi_request(app, _body(i)) for i in range(n)])
+
+    with ThreadPeak() as threads:
+        start = time.perf_counter()
+        results = asyncio.run(all_at_once())
+    return _report(results, start, threads.peak)
+
+
+def run_threads(n: int, latency_ms: float, workers: int) -> dict:
+    backend._translation_memory = TranslationMemory(SlowTranslator(latency_ms))
+    client = backend.app.test_client()
+
+    def one(i):
+        resp = client.post('/simplify', data=_body(n + i), content_type='application/json')
+        return resp.status_code, time.perf_counter()
+
+    with ThreadPeak() as threads, ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(one, range(n)))
+    return _report(results, start, threads.peak)
+
+
+def _report(results: list, start: float, peak_threads: int) -> dict:
+    # latency counts from when every request arrived, queueing included
+    times = [end - start for _, end in results]
+    wall = max(times)
+    return {
+        'ok': sum(1 for status, _ in results if status == 200),
+        'wall_s': round(wall, 2),
+        'req_per_sec': round(len(results) / wall, 1),
+        'p50_ms': round(_percentile(times, 50) * 1000, 1),
+        'p99_ms': round(_percentile(times, 99) * 1000, 1),
+        'peak_threads': peak_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--threads', type=int, default=64, help='pool size for the threaded run')
+    args = parser.parse_args()
+
+    print(f'{args.requests} concurrent /simplify requests, translator takes {args.latency_ms:.0f} ms per call\n')
+    print(f"{'server':<22} {'ok':>6} {'wall s':>8} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'threads':>8}")
+    for name, run in (
+        ('asgi', lambda: run_asgi(args.requests, args.latency_ms)),
+        (f'flask x{args.threads} threads', lambda: run_threads(args.requests, args.latency_ms, args.threads)),
+    ):
+        r = run()
+        print(f"{name:<22} {r['ok']:>6} {r['wall_s']:>8.2f} {r['req_per_sec']:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['peak_threads']:>8}", flush=True)
+    shutil.rmtree(_tmp, True)
+
+
+if __name__ == '__main__':
+    main()
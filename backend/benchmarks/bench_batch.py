@@ -0,0 +1,63 @@
+# throughput of simplify_batch (process pool) vs one document at a time
+# usage: python benchmarks/bench_batch.py [--docs N] [--workers N]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_notices(n: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    sentences = [
+        'You must submit the renewal form by March 15.',
+        'The tenant shall utilize the premises for residential purposes only.',
+        'Prior to termination, the landlord will provide written notice.',
+        'Please bring a photo ID and proof of address to your appointment.',
+        'Additional fees may apply in order to facilitate processing.',
+        'Failure to respond may result in the loss of benefits.',
+        'Payment is due 04/01/2025 at the county office.',
+        'Residents can obtain assistance from the City Council.',
+    ]
+    return [' '.join(rng.choice(sentences) for _ in range(rng.randint(20, 80))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ['PLAINSPEAK_BATCH_WORKERS'] = str(args.workers)
+
+    import batch
+
+    docs = synthetic_notices(args.docs)
+    print(f'{len(docs)} documents, {batch.BATCH_WORKERS} workers, {os.cpu_count()} cpus')
+
+    start = time.perf_counter()
+    serial = [batch.simplify_document(d, 4) for d in docs]
+    serial_s = time.perf_counter() - start
+
+    # first call pays for starting the workers, so time a warm pool too
+    start = time.perf_counter()
+    pooled = batch.simplify_batch(docs, 4)
+    cold_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch.simplify_batch(docs, 4)
+    warm_s = time.perf_counter() - start
+
+    assert pooled == serial
+
+    print(f"{'path':<12} {'seconds':>8} {'docs/s':>9}")
+    for name, secs in (('serial', serial_s), ('batch cold', cold_s), ('batch warm', warm_s)):
+        print(f'{name:<12} {secs:>8.2f} {len(docs) / secs:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
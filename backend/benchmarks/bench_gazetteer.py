@@ -0,0 +1,91 @@
+# stakeholder lookup: one re.search per term (the old loop) vs the
+# Aho-Corasick gazetteer, pure python and pyahocorasick when installed
+# usage: python benchmarks/bench_gazetteer.py [--terms N] [--chars N]
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gazetteer
+
+
+def synthetic_entries(base: list, size: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    entries = list(base)
+    seen = {name for name, _ in entries}
+    kinds = ['County', 'Township', 'Public Schools', 'Housing Commission', 'Program', 'Authority']
+    while len(entries) < size:
+        name = ' '.join(
+            rng.choice('BCDFGHKLMNPRSTW') + ''.join(rng.choice('aeiourlnst') for _ in range(rng.randint(3, 8)))
+            for _ in range(rng.randint(1, 2))
+        ) + ' ' + rng.choice(kinds)
+        if name not in seen:
+            seen.add(name)
+            entries.append((name, 'Synthetic'))
+    return entries
+
+
+def synthetic_text(entries: list, chars: int, seed: int = 9) -> str:
+    rng = random.Random(seed)
+    filler = ('the notice says residents must apply before the deadline and bring '
+              'proof of income to the office listed below').split()
+    out = []
+    size = 0
+    while size < chars:
+        word = rng.choice(entries)[0] if rng.random() < 0.03 else rng.choice(filler)
+        out.append(word)
+        size += len(word) + 1
+    return ' '.join(out)
+
+
+def legacy_find(text: str, entries: list) -> list:
+    return [(name, role) for name, role in entries if re.search(rf"\b{re.escape(name)}\b", text)]
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--terms', type=int, default=10000)
+    parser.add_argument('--chars', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    entries = synthetic_entries(gazetteer.load_entries(), args.terms)
+    text = synthetic_text(entries, args.chars)
+    expected = legacy_find(text, entries)
+
+    engines = []
+    if gazetteer.ahocorasick is not None:
+        start = time.perf_counter()
+        engines.append(('automaton (C)', gazetteer.Gazetteer(entries), time.perf_counter() - start))
+    c_module, gazetteer.ahocorasick = gazetteer.ahocorasick, None
+    start = time.perf_counter()
+    engines.append(('automaton (py)', gazetteer.Gazetteer(entries), time.perf_counter() - start))
+    gazetteer.ahocorasick = c_module
+
+    print(f'{len(entries)} terms, {len(text)} chars, {len(expected)} distinct hits')
+    print(f"{'path':<16} {'build ms':>9} {'find ms':>9} {'speedup':>8}")
+    legacy = _best_ms(lambda: legacy_find(text, entries), 1)
+    print(f"{'re per term':<16} {'-':>9} {legacy:>9.2f} {1.0:>7.1f}x")
+    for name, engine, build in engines:
+        assert engine.find(text) == expected, name
+        ms = _best_ms(lambda: engine.find(text), args.repeat)
+        print(f'{name:<16} {build * 1000:>9.1f} {ms:>9.2f} {legacy / ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
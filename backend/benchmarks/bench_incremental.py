@@ -0,0 +1,99 @@
+# resubmitting an edited document to /simplify: posts a civic document,
+# then edits of growing size in the middle of it three ways: a plain request
+# with nothing remembered (cold), a plain request with the base document's
+# sentences in the sentence memo (memo), and one with previous_result_id,
+# where only the sentences around the edit are redone and a patch comes
+# back (patch). Reports median latency and response size; the patch column
+# should follow the edit size and not the document size.
+# usage: python benchmarks/bench_incremental.py [--sizes 100k,1m] [--edits 20,2000,20000] [--repeat N]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-bench-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+
+import app as backend
+import corpus
+import incremental
+
+
+def edited(text: str, chars: int, n: int) -> str:
+    # swap chars characters in the middle for different sentences; n keeps
+    # every edit distinct so neither cache answers for it
+    filler = corpus.generate('legal', chars + 200, seed=n)[:chars]
+    mid = len(text) // 2
+    return text[:mid] + filler + text[mid + chars:]
+
+
+def timed(client, body: dict) -> tuple:
+    start = time.perf_counter()
+    resp = client.post('/simplify', json=body)
+    elapsed = time.perf_counter() - start
+    if resp.status_code != 200:
+        raise RuntimeError(f'{resp.status_code}: {resp.get_data(as_text=True)[:200]}')
+    return elapsed, len(resp.get_data()), resp.get_json()
+
+
+def run(client, text: str, chars: int, repeat: int, grade: int) -> dict:
+    cold_ms, memo_ms, full_bytes, patch_ms, patch_bytes = [], [], [], [], []
+    for i in range(repeat):
+        backend._result_cache.clear()
+        incremental._memo.clear()
+        base = timed(client, {'text': text, 'target_grade': grade})[2]
+        new = edited(text, chars, i)
+
+        t, size, _ = timed(client, {'text': new, 'target_grade': grade})
+        memo_ms.append(t * 1000)
+        full_bytes.append(size)
+
+        backend._result_cache.clear()
+        incremental._memo.clear()
+        cold_ms.append(timed(client, {'text': new, 'target_grade': grade})[0] * 1000)
+
+        backend._result_cache.clear()
+        incremental._memo.clear()
+        t, size, body = timed(client, {'text': new, 'target_grade': grade, 'previous_result_id': base['result_id']})
+        if 'patch' not in body:
+            raise RuntimeError('expected a patch back')
+        patch_ms.append(t * 1000)
+        patch_bytes.append(size)
+
+    def median(values):
+        return sorted(values)[len(values) // 2]
+    return {
+        'cold_ms': median(cold_ms), 'memo_ms': median(memo_ms), 'full_bytes': median(full_bytes),
+        'patch_ms': median(patch_ms), 'patch_bytes': median(patch_bytes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100k,1m', help='document sizes: ' + ','.join(corpus.SIZES))
+    parser.add_argument('--edits', default='20,2000,20000', help='characters replaced per edit')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--grade', type=int, default=5)
+    args = parser.parse_args()
+
+    client = backend.app.test_client()
+    print(f"{'doc':<6} {'edit chars':>10} {'cold ms':>9} {'memo ms':>9} {'full bytes':>11} "
+          f"{'patch ms':>9} {'patch bytes':>12} {'speedup':>8}")
+    for size_name in [s.strip() for s in args.sizes.split(',') if s.strip()]:
+        text = corpus.generate('civic', corpus.SIZES[size_name])
+        for chars in [int(c) for c in args.edits.split(',') if c.strip()]:
+            r = run(client, text, chars, args.repeat, args.grade)
+            print(f"{size_name:<6} {chars:>10} {r['cold_ms']:>9.1f} {r['memo_ms']:>9.1f} {r['full_bytes']:>11} "
+                  f"{r['patch_ms']:>9.2f} {r['patch_bytes']:>12} {r['cold_ms'] / r['patch_ms']:>7.0f}x", flush=True)
+    shutil.rmtree(_tmp, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# load test for the summarizer micro-batcher: closed-loop clients hammer
+# summarize() while max_wait / max_batch are swept, reporting throughput and
+# latency percentiles for each setting
+# usage: python benchmarks/bench_microbatch.py [--clients N,N] [--seconds S] [--model PATH]
+#
+# without --model the forward pass is simulated as a fixed per-call cost
+# plus a smaller per-item cost (sleeping, so it releases the GIL like torch
+# does), which is the shape that makes batching pay off on a CPU model
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import summarizer
+
+
+class SimulatedSummarizer(summarizer.Summarizer):
+    def __init__(self, call_ms: float, item_ms: float, **kwargs):
+        super().__init__('simulated', **kwargs)
+        self.call_ms = call_ms
+        self.item_ms = item_ms
+
+    def load(self) -> bool:
+        return True
+
+    def _generate_batch(self, texts: list, max_length: int, min_length: int) -> list:
+        with self._infer_lock:
+            time.sleep((self.call_ms + self.item_ms * len(texts)) / 1000)
+        return [(text[:max_length], len(text.split())) for text in texts]
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_load(engine, clients: int, seconds: float, texts: list) -> dict:
+    latencies = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        mine = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            engine.summarize(rng.choice(texts))
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    batching = engine.stats()['batching']
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'avg_batch': (batching or {}).get('avg_batch') or 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', default='2,16', help='concurrency levels to try')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--model', default=None, help='summarizer model dir; simulated when omitted')
+    parser.add_argument('--call-ms', type=float, default=40.0)
+    parser.add_argument('--item-ms', type=float, default=6.0)
+    parser.add_argument('--waits', default='0,2,5,10,20')
+    parser.add_argument('--batches', default='1,4,8,16')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    words = 'the county will review each application and notify residents of the decision by mail'.split()
+    texts = [' '.join(rng.choice(words) for _ in range(rng.randint(60, 300))) for _ in range(64)]
+
+    def make(batch_max, wait_ms):
+        if args.model is None:
+            return SimulatedSummarizer(args.call_ms, args.item_ms, batch_max=batch_max, batch_wait_ms=wait_ms)
+        engine = summarizer.Summarizer(args.model, batch_max=batch_max, batch_wait_ms=wait_ms)
+        if not engine.warmup():
+            sys.exit('could not load model: ' + str(engine.error))
+        return engine
+
+    source = args.model or f'simulated ({args.call_ms} ms/call + {args.item_ms} ms/item)'
+    print(f'{source}, {args.seconds}s per setting')
+    print(f"{'clients':>7} {'batch':>5} {'wait ms':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    for clients in [int(c) for c in args.clients.split(',')]:
+        for batch_max in [int(b) for b in args.batches.split(',')]:
+            waits = [0.0] if batch_max == 1 else [float(w) for w in args.waits.split(',')]
+            for wait_ms in waits:
+                result = run_load(make(batch_max, wait_ms), clients, args.seconds, texts)
+                print(f"{clients:>7} {batch_max:>5} {wait_ms:>8.1f} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} "
+                      f"{result['p99_ms']:>8.1f} {result['avg_batch']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
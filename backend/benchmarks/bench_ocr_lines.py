@@ -0,0 +1,102 @@
+# line assembly from image_to_data output: the old per-word loop vs the
+# columnar numpy path vs the columnar pure-python fallback
+# usage: python benchmarks/bench_ocr_lines.py [--tsv PATH] [--repeat N]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr_lines
+from recorded_ocr import FIXTURES, load_tsv
+
+FIXTURE = os.path.join(FIXTURES, 'dense_page.tsv')
+
+
+def legacy_assemble(data: dict) -> tuple:
+    # the loop _ocr_image_to_lines used to run
+    n = len(data.get('text', []))
+    by_line = {}
+    for i in range(n):
+        txt = (data['text'][i] or '').strip()
+        if not txt:
+            continue
+        if int(data.get('conf', ['-1'])[i]) < 0:
+            continue
+
+        key = (data.get('block_num', [0])[i], data.get('line_num', [0])[i])
+        left = data.get('left', [0])[i]
+        top = data.get('top', [0])[i]
+        width = data.get('width', [0])[i]
+        height = data.get('height', [0])[i]
+
+        entry = by_line.get(key)
+
+        if entry is None:
+            entry = {'words': [], 'x1': left, 'y1': top, 'x2': left+width, 'y2': top+height}
+        else:
+            entry['x1'] = min(entry['x1'], left)
+            entry['y1'] = min(entry['y1'], top)
+            entry['x2'] = max(entry['x2'], left+width)
+            entry['y2'] = max(entry['y2'], top+height)
+        entry['words'].append(txt)
+        by_line[key] = entry
+
+    lines = []
+    for _, v in by_line.items():
+        text_line = ' '.join(v['words']).strip()
+        lines.append({
+            'text': text_line,
+            'x': int(v['x1']),
+            'y': int(v['y1']),
+            'w': int(v['x2']-v['x1']),
+            'h': int(v['y2']-v['y1'])
+        })
+    lines.sort(key=lambda d: (d['y'], d['x']))
+    full_text = '\n'.join(l['text'] for l in lines if l['text'])
+    return lines, full_text
+
+
+def _best_ms(fn, data, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tsv', default=FIXTURE)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    data = load_tsv(args.tsv)
+    n = len(data['text'])
+    expected = legacy_assemble(data)
+
+    def python_path(d):
+        return ocr_lines._assemble_lines_python(d, d['text'], len(d['text']))
+
+    paths = [('legacy loop', legacy_assemble), ('columnar python', python_path)]
+    if ocr_lines.np is not None:
+        def numpy_path(d):
+            return ocr_lines._assemble_lines_numpy(d, d['text'], len(d['text']))
+        paths.append(('columnar numpy', numpy_path))
+
+    print(f'{n} rows, {len(expected[0])} lines')
+    print(f"{'path':<16} {'ms':>8} {'speedup':>8}")
+    base = None
+    for name, fn in paths:
+        assert fn(data) == expected, name
+        ms = _best_ms(fn, data, args.repeat)
+        base = base or ms
+        print(f'{name:<16} {ms:>8.3f} {base / ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# response sizes on realistic documents: each endpoint's full body against
+# its compact=1 / fields= variants, identity vs gzip vs deflate, plus the
+# time to serialize the full body with the stdlib encoder and with orjson
+# usage: python benchmarks/bench_payloads.py [--size 100k] [--repeat N]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-bench-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+os.environ.pop('PLAINSPEAK_OCR_CACHE_DIR', None)
+
+import app as backend
+import corpus
+import fastjson
+import recorded_ocr
+
+URLS = ['https://www.usa.gov/', 'https://www.benefits.gov/', 'https://www.consumerfinance.gov/']
+
+
+def _post_json(client, path, body, encoding):
+    return client.post(path, json=body, headers={'Accept-Encoding': encoding})
+
+
+def cases(size: int):
+    # (name, variant, fn(encoding) -> response)
+    client = backend.app.test_client()
+    text = corpus.generate('civic', size)
+    legal = corpus.generate('legal', min(size, 20000))
+
+    for variant, query in (('full', ''), ('fields', '?fields=simplified_text,actions')):
+        yield '/simplify', variant, lambda enc, q=query: _post_json(
+            client, '/simplify' + q, {'text': text, 'target_grade': 5}, enc)
+
+    for variant, query in (('full', ''), ('compact', '?compact=1')):
+        yield '/analyze', variant, lambda enc, q=query: _post_json(
+            client, '/analyze' + q, {'text': legal, 'urls': URLS}, enc)
+
+    if backend.Image is not None:
+        data = recorded_ocr.recordings()['dense_page']
+        buf = BytesIO()
+        backend.Image.new('L', recorded_ocr.page_size(data), 255).save(buf, format='PNG')
+        png = buf.getvalue()
+
+        def ocr(enc, q):
+            with recorded_ocr.replay(backend, data):
+                return client.post('/ocr_simplify' + q, data={'image': (BytesIO(png), 'page.png')},
+                                   content_type='multipart/form-data', headers={'Accept-Encoding': enc})
+
+        for variant, query in (
+            ('full', ''),
+            ('compact', '?compact=1'),
+            ('compact+fields', '?compact=1&fields=full_text,simplified_text,actions,action_boxes'),
+        ):
+            yield '/ocr_simplify', variant, lambda enc, q=query: ocr(enc, q)
+
+    # fill one history page
+    for i in range(50):
+        client.post('/simplify', json={'text': corpus.generate('civic', 2000, seed=i), 'target_grade': 5})
+    for variant, query in (('full', ''), ('fields', '&fields=items.id,items.timestamp,items.type,next_cursor')):
+        yield '/history', variant, lambda enc, q=query: client.get('/history?limit=50' + q, headers={'Accept-Encoding': enc})
+
+
+def encode_ms(obj, engine: str, repeat: int) -> float:
+    saved = fastjson.ENGINE
+    fastjson.ENGINE = engine
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fastjson.dumps(obj, sort_keys=True)
+            times.append(time.perf_counter() - start)
+    finally:
+        fastjson.ENGINE = saved
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', default='100k', help='civic document size: ' + ','.join(corpus.SIZES))
+    parser.add_argument('--repeat', type=int, default=20, help='serializations timed per body')
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<14} {'variant':<16} {'identity':>10} {'gzip':>9} {'deflate':>9} {'std ms':>8} {'orjson ms':>10}")
+    for name, variant, fn in cases(corpus.SIZES[args.size]):
+        backend._result_cache.clear()
+        backend._ocr_cache.clear()
+        sizes = {}
+        for enc in ('identity', 'gzip', 'deflate'):
+            resp = fn(enc)
+            if resp.status_code != 200:
+                raise RuntimeError(f'{name} {resp.status_code}: {resp.get_data(as_text=True)[:200]}')
+            sizes[enc] = len(resp.get_data())
+            if enc == 'identity':
+                obj = resp.get_json()
+        std = encode_ms(obj, 'std', args.repeat)
+        fast = encode_ms(obj, 'orjson', args.repeat) if fastjson.orjson is not None else float('nan')
+        print(f"{name:<14} {variant:<16} {sizes['identity']:>10} {sizes['gzip']:>9} {sizes['deflate']:>9} "
+              f'{std:>8.3f} {fast:>10.3f}', flush=True)
+    shutil.rmtree(_tmp, True)
+
+
+if __name__ == '__main__':
+    main()
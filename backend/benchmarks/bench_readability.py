@@ -0,0 +1,66 @@
+# readability scoring on a typical /simplify request: the before and after
+# reports together, cold (empty syllable memo) and warm
+# usage: python benchmarks/bench_readability.py [--sentences N] [--repeat N]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import readability
+from document import Document
+from simplifier import simplify_sentences
+
+SENTENCES = [
+    'You must submit the renewal form by March 15.',
+    'The tenant shall utilize the premises for residential purposes only.',
+    'Prior to termination, the landlord will provide written notice.',
+    'Please bring a photo ID and proof of address to your appointment.',
+    'Additional fees may apply in order to facilitate processing.',
+    'Failure to respond may result in the loss of benefits.',
+    'Payment is due 04/01/2025 at the county office.',
+    'Residents can obtain assistance from the City Council.',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sentences', type=int, default=30)
+    parser.add_argument('--grade', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(4)
+    text = ' '.join(rng.choice(SENTENCES) for _ in range(args.sentences))
+    doc = Document(text)
+    before = doc.sentences
+    after = simplify_sentences(doc, args.grade)
+
+    def report():
+        return readability.readability_report(before, after, args.grade)
+
+    readability._word_stats.cache_clear()
+    start = time.perf_counter()
+    report()
+    cold = (time.perf_counter() - start) * 1000
+
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        report()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    p50 = times[len(times) // 2] * 1000
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+
+    words = report()['before']['words'] + report()['after']['words']
+    print(f'{len(text)} chars, {len(before)} + {len(after)} sentences, {words} words scored')
+    print(f'cold {cold:.3f} ms   warm p50 {p50:.3f} ms   p99 {p99:.3f} ms')
+    print('under 1 ms' if p50 < 1 else 'OVER 1 ms')
+
+
+if __name__ == '__main__':
+    main()
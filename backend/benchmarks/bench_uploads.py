@@ -0,0 +1,71 @@
+# peak memory per upload: posts noise PNGs of growing file size to
+# /ocr_simplify (tesseract replayed from a recording) and prints the
+# X-Peak-RSS-KB the server reports for each, so a flat column means the
+# upload isn't being held in memory. The test client's own copy of the
+# body lives in the same process, so the numbers include it; post with curl
+# to a running server for the server's share alone.
+# usage: python benchmarks/bench_uploads.py [--sizes-mb 1,4,16,32] [--fixture NAME]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-bench-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_OCR_CACHE_DIR', None)
+
+import app as backend
+import metrics
+import recorded_ocr
+
+
+def noise_png(megabytes: float) -> bytes:
+    # random pixels don't compress, so a side of sqrt(bytes) gets close to
+    # the asked-for file size
+    side = int((megabytes * 1024 * 1024) ** 0.5)
+    img = backend.Image.frombytes('L', (side, side), os.urandom(side * side))
+    buf = BytesIO()
+    img.save(buf, format='PNG', compress_level=1)
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes-mb', default='1,4,16,32')
+    parser.add_argument('--fixture', default='notice_page')
+    args = parser.parse_args()
+
+    if backend.Image is None:
+        sys.exit('needs pillow')
+    data = recorded_ocr.recordings()[args.fixture]
+    client = backend.app.test_client()
+
+    print(f"{'upload MB':>10} {'pixels':>12} {'status':>7} {'peak RSS MB':>12}")
+    for mb in [float(s) for s in args.sizes_mb.split(',') if s.strip()]:
+        png = noise_png(mb)
+        backend._ocr_cache.clear()
+        with recorded_ocr.replay(backend, data):
+            resp = client.post(
+                '/ocr_simplify',
+                data={'image': (BytesIO(png), 'noise.png')},
+                content_type='multipart/form-data',
+            )
+        side = int((mb * 1024 * 1024) ** 0.5)
+        peak = resp.headers.get('X-Peak-RSS-KB')
+        peak = f'{int(peak) / 1024:.1f}' if peak else 'n/a'
+        print(f'{len(png) / 1024 / 1024:>10.1f} {side * side:>12} {resp.status_code:>7} {peak:>12}', flush=True)
+        del png
+
+    if not metrics.METRICS_ENABLED:
+        print('\nPLAINSPEAK_METRICS=0, so no peak RSS was recorded')
+    shutil.rmtree(_tmp, True)
+
+
+if __name__ == '__main__':
+    main()
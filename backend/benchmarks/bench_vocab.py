@@ -0,0 +1,92 @@
+# compares the old one-re.sub-per-word loop against the compiled vocab matcher
+# usage: python benchmarks/bench_vocab.py [--sentences N] [--repeat N] [--max-entries N]
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vocab import VocabularySimplifier, load_vocabulary
+
+
+def legacy_simplify(sentence: str, replacements: dict) -> str:
+    # what simplify_text_rule_based used to do for every sentence
+    patterns = {r'\b' + re.escape(k) + r'\b': v for k, v in replacements.items()}
+    for pattern, replacement in patterns.items():
+        sentence = re.sub(pattern, replacement, sentence, flags=re.IGNORECASE)
+    return sentence
+
+
+def synthetic_vocabulary(base: dict, size: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    vocab = dict(base)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    while len(vocab) < size:
+        word = ''.join(rng.choice(letters) for _ in range(rng.randint(6, 12)))
+        vocab.setdefault(word, word[:3])
+    return vocab
+
+
+def synthetic_sentences(vocab: dict, n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    filler = ('the tenant shall within thirty days of notice the landlord may '
+              'any and all fees applicable under this agreement').split()
+    keys = list(vocab)
+    out = []
+    for _ in range(n):
+        words = [rng.choice(filler) for _ in range(rng.randint(12, 30))]
+        for _ in range(3):
+            words.insert(rng.randrange(len(words)), rng.choice(keys).capitalize())
+        out.append(' '.join(words) + '.')
+    return out
+
+
+def _time(fn, sentences, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for s in sentences:
+            fn(s)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sentences', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    # the legacy loop gets very slow at 5000 entries, so that size is opt-in
+    parser.add_argument('--max-entries', type=int, default=1000)
+    args = parser.parse_args()
+
+    base = load_vocabulary()
+    print(f"{'entries':>8} {'legacy ms':>11} {'compiled ms':>12} {'speedup':>8}")
+
+    for size in (len(base), 100, 1000, 5000):
+        if size > args.max_entries:
+            continue
+        vocab = synthetic_vocabulary(base, size)
+        sentences = synthetic_sentences(vocab, args.sentences)
+        engine = VocabularySimplifier(vocab)
+
+        # both paths have to agree before the timing means anything
+        for s in sentences[:20]:
+            assert engine(s) == legacy_simplify(s, vocab), s
+
+        # the legacy loop gets slow fast, so give it fewer sentences at big sizes
+        legacy_sents = sentences if size <= 100 else sentences[:20]
+        legacy_repeat = args.repeat if size <= 100 else 1
+        legacy = _time(lambda s: legacy_simplify(s, vocab), legacy_sents, legacy_repeat)
+        legacy = legacy * len(sentences) / len(legacy_sents)
+        compiled = _time(engine, sentences, args.repeat)
+
+        print(f"{size:>8} {legacy * 1000:>11.1f} {compiled * 1000:>12.1f} {legacy / compiled:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# synthetic legal and civic text at a given size, built from sentence
+# templates with random slots: agencies and counties from the gazetteer,
+# dates, dollar amounts, the action/pro/con cue words and the long words the
+# vocabulary pass rewrites. Deterministic for a given (kind, size, seed).
+
+import random
+
+import gazetteer
+
+SIZES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+TEMPLATES = {
+    'legal': [
+        'The tenant shall utilize the premises for residential purposes only.',
+        'Prior to termination, the landlord will provide written notice to {org}.',
+        'Notwithstanding section {n}.{m}, the lessee must pay ${amount} by {month} {day}.',
+        'Subsequent to the hearing, the court may require additional documentation.',
+        'The parties agree to comply with all ordinances in effect in {county}.',
+        'Failure to remit payment due {mm}/{day}/2025 may result in penalties.',
+        'This agreement does not limit the rights of {org} under state law.',
+        'The landlord shall demonstrate that the repairs were completed in order to obtain the deposit.',
+        'Any amendment to this lease requires the signature of both parties.',
+        'The lessee may terminate the agreement with thirty days of written notice.',
+    ],
+    'civic': [
+        'Residents of {county} should submit the renewal form by {month} {day}.',
+        'The {program} will help families reduce costs for groceries and utilities.',
+        'Please bring a photo ID and proof of address to your appointment.',
+        'Budget cuts are a concern because they increase the burden on {org}.',
+        'The new policy is expected to improve access and support local schools.',
+        'Applications are due {mm}/{day} at the {county} office.',
+        'There is a risk that delays will harm residents who need assistance.',
+        '{org} will commence public hearings on the proposal next month.',
+        'Voters can obtain a sample ballot from the county clerk.',
+        'The program offers an opportunity to protect older adults from rising rents.',
+    ],
+}
+
+
+def _entries_by_role() -> dict:
+    by_role = {}
+    for name, role in gazetteer.load_entries():
+        by_role.setdefault(role, []).append(name)
+    return by_role
+
+
+_BY_ROLE = _entries_by_role()
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        org=rng.choice(_BY_ROLE.get('Agency') or ['the city']),
+        county=rng.choice(_BY_ROLE.get('County') or ['the county']),
+        program=rng.choice(_BY_ROLE.get('Program') or ['assistance program']),
+        month=rng.choice(MONTHS),
+        day=rng.randint(1, 28),
+        mm=rng.randint(1, 12),
+        n=rng.randint(1, 20),
+        m=rng.randint(1, 9),
+        amount=rng.randint(50, 5000),
+    )
+
+
+def generate(kind: str, size: int, seed: int = 7) -> str:
+    # about `size` characters of paragraphs, a blank line every few sentences
+    templates = TEMPLATES[kind]
+    rng = random.Random(f'{kind}:{size}:{seed}')
+    out = []
+    length = 0
+    while length < size:
+        sentence = _fill(rng.choice(templates), rng)
+        sep = '\n\n' if rng.random() < 0.15 else ' '
+        out.append(sentence + sep)
+        length += len(sentence) + len(sep)
+    return ''.join(out)[:size].rstrip()
+
+
+def documents(kind: str, size: int, count: int, seed: int = 7) -> list:
+    # `count` documents adding up to about `size` characters
+    per_doc = max(200, size // count)
+    return [generate(kind, per_doc, seed + i) for i in range(count)]
@@ -0,0 +1,60 @@
+# replays tesseract image_to_data output saved as TSV, so the OCR code
+# paths can be timed on machines without the tesseract binary
+
+import contextlib
+import glob
+import os
+
+from ocr_lines import parse_tsv
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_tsv(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_tsv(f.read())
+
+
+def recordings() -> dict:
+    # {fixture name: image_to_data dict} for every fixtures/*.tsv
+    return {
+        os.path.splitext(os.path.basename(path))[0]: load_tsv(path)
+        for path in sorted(glob.glob(os.path.join(FIXTURES, '*.tsv')))
+    }
+
+
+def page_size(data: dict) -> tuple:
+    # the level 1 row spans the whole page
+    for i, level in enumerate(data['level']):
+        if level == 1:
+            return data['width'][i], data['height'][i]
+    return max(data['left']) + 1, max(data['top']) + 1
+
+
+class RecordedTesseract:
+    # stands in for the pytesseract module: every image gets the recording
+
+    def __init__(self, data: dict, version: str = 'recorded'):
+        self.data = data
+        self.version = version
+
+    def image_to_data(self, image, output_type=None, **kwargs):
+        return self.data
+
+    def get_tesseract_version(self):
+        return self.version
+
+
+class _Output:
+    DICT = 'dict'
+
+
+@contextlib.contextmanager
+def replay(module, data: dict):
+    # swaps module.pytesseract / module.TessOutput for the recording
+    saved = module.pytesseract, module.TessOutput
+    module.pytesseract, module.TessOutput = RecordedTesseract(data), _Output
+    try:
+        yield
+    finally:
+        module.pytesseract, module.TessOutput = saved
@@ -0,0 +1,264 @@
+# the backend benchmark suite: the text pipeline functions and the Flask
+# endpoints (through the test client) on synthetic legal/civic corpora from
+# 1 KB to 10 MB, plus OCR line assembly and /ocr_simplify replaying recorded
+# tesseract output. Reports ops/sec, p50/p99 latency and peak traced memory
+# per case, and compares against a stored baseline.
+# usage: python benchmarks/suite.py [--sizes 1k,10k,...] [--only REGEX] [--min-time S]
+#        [--json PATH] [--baseline PATH] [--save-baseline] [--fail-on-regression]
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# keep the suite's requests out of the real history and caches
+_tmp = tempfile.mkdtemp(prefix='plainspeak-bench-')
+atexit.register(shutil.rmtree, _tmp, True)
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+os.environ.pop('PLAINSPEAK_OCR_CACHE_DIR', None)
+os.environ.pop('PLAINSPEAK_SUMMARIZER_WARMUP', None)
+
+import app as backend
+import corpus
+import incremental
+import recorded_ocr
+from document import Document
+from simplifier import _detect_pros_cons, _detect_stakeholders, extract_actions, simplify_text_rule_based
+
+BASELINE = os.path.join(HERE, 'baseline.json')
+
+# p50 has to move by more than this fraction, and by more than the noise
+# floor, to count as a change
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR_MS = 0.05
+
+
+def mixed_corpus(size: int) -> str:
+    half = size // 2
+    return corpus.generate('legal', half) + '\n\n' + corpus.generate('civic', size - half)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(fn, before=None, min_time: float = 1.0, max_ops: int = 10000) -> dict:
+    # the first call runs under tracemalloc for peak memory and doubles as
+    # the warmup; the timed calls after it run untraced
+    if before is not None:
+        before()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    times = []
+    spent = 0.0
+    while not times or (spent < min_time and len(times) < max_ops):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        spent += elapsed
+
+    return {
+        'ops': len(times),
+        'ops_per_sec': round(len(times) / spent, 2),
+        'p50_ms': round(_percentile(times, 50) * 1000, 3),
+        'p99_ms': round(_percentile(times, 99) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def _clear_result_cache():
+    # the sentence memo and edit states would answer a repeated text too
+    backend._result_cache.clear()
+    backend._edit_states.clear()
+    incremental._memo.clear()
+
+
+def _clear_ocr_cache():
+    backend._ocr_cache.clear()
+
+
+def _checked(resp):
+    if resp.status_code >= 400:
+        raise RuntimeError(f'{resp.status_code}: {resp.get_data(as_text=True)[:200]}')
+    # streamed bodies only run when they are read
+    resp.get_data()
+    return resp
+
+
+def text_cases(sizes: list):
+    # (name, size label, fn, before) for everything that takes text
+    client = backend.app.test_client()
+    for label in sizes:
+        text = mixed_corpus(corpus.SIZES[label])
+        docs = corpus.documents('civic', corpus.SIZES[label], 16)
+        body = text.encode('utf-8')
+
+        yield 'simplify_text_rule_based', label, lambda t=text: simplify_text_rule_based(t, 8), None
+        yield 'extract_actions', label, lambda t=text: extract_actions(t), None
+        yield '_detect_pros_cons', label, lambda t=text: _detect_pros_cons(Document(t)), None
+        yield '_detect_stakeholders', label, lambda t=text: _detect_stakeholders(t), None
+
+        yield 'POST /simplify', label, lambda t=text: _checked(
+            client.post('/simplify', json={'text': t, 'target_grade': 5})), _clear_result_cache
+        yield 'POST /analyze', label, lambda t=text: _checked(
+            client.post('/analyze', json={'text': t})), None
+        yield 'POST /simplify_stream', label, lambda b=body: _checked(
+            client.post('/simplify_stream?target_grade=5', data=b, content_type='text/plain')), None
+        yield 'POST /simplify/batch', label, lambda d=docs: _checked(
+            client.post('/simplify/batch', json={'documents': d, 'target_grade': 5})), None
+
+
+def _blank_png(size: tuple) -> bytes:
+    buf = BytesIO()
+    backend.Image.new('L', size, 255).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def ocr_cases():
+    # sized by fixture instead of corpus size; the pixels are blank since
+    # the recording supplies the words
+    if backend.Image is None:
+        return
+    client = backend.app.test_client()
+    for name, data in recorded_ocr.recordings().items():
+        size = recorded_ocr.page_size(data)
+        img = backend.Image.new('L', size, 255)
+        png = _blank_png(size)
+
+        def ocr_lines(img=img, data=data):
+            with recorded_ocr.replay(backend, data):
+                return backend._ocr_image_to_lines(img)
+
+        def ocr_endpoint(png=png, data=data):
+            with recorded_ocr.replay(backend, data):
+                return _checked(client.post(
+                    '/ocr_simplify',
+                    data={'image': (BytesIO(png), 'page.png')},
+                    content_type='multipart/form-data',
+                ))
+
+        yield '_ocr_image_to_lines', name, ocr_lines, None
+        yield 'POST /ocr_simplify', name, ocr_endpoint, _clear_ocr_cache
+
+
+def machine_info() -> dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    # [(key, baseline p50, p50, ratio, verdict), ...] for keys in both
+    rows = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None or not base.get('p50_ms'):
+            continue
+        ratio = result['p50_ms'] / base['p50_ms']
+        delta = result['p50_ms'] - base['p50_ms']
+        verdict = ''
+        if abs(delta) > NOISE_FLOOR_MS:
+            if ratio > 1 + tolerance:
+                verdict = 'REGRESSION'
+            elif ratio < 1 / (1 + tolerance):
+                verdict = 'faster'
+        rows.append((key, base['p50_ms'], result['p50_ms'], ratio, verdict))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default=','.join(corpus.SIZES), help='corpus sizes: ' + ','.join(corpus.SIZES))
+    parser.add_argument('--only', default=None, help='regex on "case[size]"')
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds of timed calls per case')
+    parser.add_argument('--no-ocr', action='store_true')
+    parser.add_argument('--json', default=None, help='write results here')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in corpus.SIZES]
+    if unknown:
+        parser.error('unknown sizes: ' + ', '.join(unknown))
+    only = re.compile(args.only) if args.only else None
+
+    cases = list(text_cases(sizes))
+    if not args.no_ocr:
+        cases += list(ocr_cases())
+
+    results = {}
+    print(f"{'case':<46} {'ops':>6} {'ops/sec':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak KB':>10}")
+    for name, label, fn, before in cases:
+        key = f'{name}[{label}]'
+        if only is not None and not only.search(key):
+            continue
+        r = measure(fn, before, min_time=args.min_time)
+        results[key] = r
+        print(f"{key:<46} {r['ops']:>6} {r['ops_per_sec']:>10.2f} {r['p50_ms']:>10.3f} "
+              f"{r['p99_ms']:>10.3f} {r['peak_kb']:>10.1f}", flush=True)
+
+    report = {'machine': machine_info(), 'created': int(time.time()), 'results': results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        # merge, so a filtered run only replaces the cases it measured
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                merged = json.load(f).get('results', {})
+        merged.update(results)
+        report['results'] = merged
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\nbaseline saved to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != machine_info():
+        print('\nnote: baseline was recorded on a different machine:', baseline.get('machine'))
+
+    rows = compare(results, baseline.get('results', {}), args.tolerance)
+    print(f"\n{'case':<46} {'base p50':>10} {'p50':>10} {'ratio':>7}")
+    for key, base, now, ratio, verdict in rows:
+        print(f'{key:<46} {base:>10.3f} {now:>10.3f} {ratio:>6.2f}x {verdict}')
+    regressions = [row for row in rows if row[4] == 'REGRESSION']
+    print(f'\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}')
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
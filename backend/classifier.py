@@ -0,0 +1,104 @@
+import json
+import os
+import re
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+LABELS_PATH = os.environ.get('PLAINSPEAK_LABELS', os.path.join(DATA_DIR, 'labels.json'))
+
+ACTION = 'action'
+PRO = 'pro'
+CON = 'con'
+DEADLINE = 'deadline'
+
+
+def load_label_config(path: str = LABELS_PATH) -> dict:
+    # {"label": [regex fragment, ...]}; deadline fragments each capture the
+    # date in group 1 and are listed in order of preference
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SentenceLabels:
+    __slots__ = ('labels', 'deadline')
+
+    def __init__(self, labels: frozenset, deadline):
+        self.labels = labels
+        self.deadline = deadline
+
+    def __contains__(self, label: str) -> bool:
+        return label in self.labels
+
+    def __repr__(self):
+        return f'SentenceLabels({sorted(self.labels)}, deadline={self.deadline!r})'
+
+
+class SentenceClassifier:
+    # every keyword of every label goes into one alternation, so a sentence
+    # is scanned once no matter how many labels there are. Each hit is then
+    # labelled by checking the short matched span against the per-label
+    # patterns, which is memoized since the same few words keep coming up.
+
+    def __init__(self, config: dict, memo_size: int = 4096):
+        self.memo_size = memo_size
+        self._memo = {}
+        self._label_patterns = {
+            label: re.compile(r'\b(?:' + '|'.join(frags) + r')\b', re.I)
+            for label, frags in config.items() if label != DEADLINE and frags
+        }
+        self._deadline_patterns = [
+            re.compile(r'\b' + frag + r'\b', re.I) for frag in config.get(DEADLINE, [])
+        ]
+
+        # deadlines first so "by March 3" wins over the bare "by \w+" cue at
+        # the same spot, then longest first so the span covers shorter hits
+        others = sorted(
+            (frag for label, frags in config.items() if label != DEADLINE for frag in frags),
+            key=len,
+            reverse=True,
+        )
+        fragments = list(config.get(DEADLINE, [])) + others
+        self._scanner = re.compile(r'\b(?:' + '|'.join(fragments) + r')\b', re.I)
+
+    def _span_labels(self, span: str) -> tuple:
+        hit = self._memo.get(span)
+        if hit is not None:
+            return hit
+
+        labels = frozenset(label for label, p in self._label_patterns.items() if p.search(span))
+        deadlines = {}
+        for i, p in enumerate(self._deadline_patterns):
+            m = p.search(span)
+            if m:
+                deadlines[i] = m.group(1)
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[span] = (labels, deadlines)
+        return labels, deadlines
+
+    def classify(self, sentence: str) -> SentenceLabels:
+        labels = set()
+        deadlines = {}
+        pos = 0
+        while True:
+            m = self._scanner.search(sentence, pos)
+            if m is None:
+                break
+            span_labels, span_deadlines = self._span_labels(m.group(0))
+            labels.update(span_labels)
+            for i, value in span_deadlines.items():
+                deadlines.setdefault(i, value)
+            # step one character so hits that start inside this one are seen
+            pos = m.start() + 1
+
+        deadline = deadlines[min(deadlines)] if deadlines else None
+        if deadline is not None:
+            labels.add(DEADLINE)
+        return SentenceLabels(frozenset(labels), deadline)
+
+
+_classifier = SentenceClassifier(load_label_config())
+
+
+def classify(sentence: str) -> SentenceLabels:
+    return _classifier.classify(sentence)
@@ -0,0 +1,84 @@
+import re
+from functools import cached_property
+
+from classifier import classify
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+class Document:
+    # everything here is computed on first use and then reused, so a request
+    # can hand the same Document to every detector without re-splitting
+
+    def __init__(self, text: str):
+        self.text = text or ''
+
+    @cached_property
+    def stripped(self) -> str:
+        return self.text.strip()
+
+    @cached_property
+    def sentences(self) -> list:
+        if not self.text:
+            return []
+        return SENTENCE_BOUNDARY.split(self.stripped)
+
+    @cached_property
+    def labels(self) -> list:
+        # one SentenceLabels per sentence; every detector reads from this
+        return [classify(s) for s in self.sentences]
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+
+def as_document(text_or_doc) -> Document:
+    if isinstance(text_or_doc, Document):
+        return text_or_doc
+    return Document(text_or_doc)
+
+
+def iter_sentences(chunks, max_sentence_chars: int = 100000):
+    # yields the same pieces as Document(text).sentences would, but from an
+    # iterable of text chunks, holding at most one unfinished sentence
+    buf = ''
+    scan_from = 0
+    started = False
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf += chunk
+        if not started:
+            buf = buf.lstrip()
+            if not buf:
+                continue
+            started = True
+
+        last = 0
+        for m in SENTENCE_BOUNDARY.finditer(buf, scan_from):
+            # whitespace running to the end of the buffer may continue in
+            # the next chunk, so wait before cutting there
+            if m.end() == len(buf):
+                break
+            yield buf[last:m.start()]
+            last = m.end()
+        buf = buf[last:]
+
+        # a run-on "sentence" with no punctuation shouldn't grow forever
+        if len(buf) > max_sentence_chars:
+            cut = buf.rfind(' ', 0, max_sentence_chars)
+            cut = cut if cut > 0 else max_sentence_chars
+            yield buf[:cut]
+            buf = buf[cut:].lstrip()
+
+        scan_from = len(buf.rstrip())
+        if scan_from:
+            scan_from -= 1
+
+    buf = buf.rstrip()
+    if buf:
+        yield buf
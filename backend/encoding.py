@@ -0,0 +1,127 @@
+import gzip
+import os
+import zlib
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+import fastjson
+from metrics import span
+
+# 0 turns compression off
+COMPRESS_LEVEL = int(os.environ.get('PLAINSPEAK_COMPRESS_LEVEL', '6'))
+# below this the gzip header and the cpu aren't worth it
+COMPRESS_MIN_BYTES = int(os.environ.get('PLAINSPEAK_COMPRESS_MIN_BYTES', '1024'))
+_COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'application/javascript')
+
+
+def parse_fields(spec: str):
+    # "simplified_text,readability.after,items.id" -> a tree of wanted keys,
+    # None meaning the whole value; None for an empty spec
+    tree = {}
+    for path in spec.split(','):
+        parts = [p for p in path.strip().split('.') if p]
+        node = tree
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            if part in node and node[part] is None:
+                break  # already asked for the whole thing
+            if last:
+                node[part] = None
+            else:
+                node = node.setdefault(part, {})
+    return tree or None
+
+
+def project(value, tree: dict):
+    # keeps only the keys in tree; lists are projected element by element,
+    # so "items.id" works on a list of items
+    if isinstance(value, list):
+        return [project(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return value
+    out = {}
+    for key, sub in tree.items():
+        if key in value:
+            out[key] = value[key] if sub is None else project(value[key], sub)
+    return out
+
+
+def requested_fields():
+    if not has_request_context():
+        return None
+    spec = request.args.get('fields')
+    return parse_fields(spec) if spec else None
+
+
+class ResponseJSONProvider(DefaultJSONProvider):
+    # jsonify through fastjson (orjson when installed), applying the
+    # request's fields= projection. Output parses the same as the stdlib
+    # provider's; non-ascii text goes out as utf-8 instead of \u escapes.
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return fastjson.dumps(obj, sort_keys=self.sort_keys, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return fastjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        fields = requested_fields()
+        if fields is not None and isinstance(obj, (dict, list)):
+            projected = project(obj, fields)
+            # errors come through whatever was asked for
+            if isinstance(obj, dict) and 'error' in obj:
+                projected['error'] = obj['error']
+            obj = projected
+
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return self._app.response_class(super().dumps(obj, indent=2) + '\n', mimetype=self.mimetype)
+        with span('serialize'):
+            body = fastjson.dumps(obj, sort_keys=self.sort_keys, default=self.default) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def negotiate(accept_encodings) -> str:
+    # 'gzip', 'deflate' or None, from a werkzeug Accept (request.accept_encodings)
+    gz = accept_encodings.quality('gzip')
+    df = accept_encodings.quality('deflate')
+    if gz <= 0 and df <= 0:
+        return None
+    return 'gzip' if gz >= df else 'deflate'
+
+
+def compress_response(response, accept_encodings):
+    # gzip/deflate for buffered text bodies the client says it can take;
+    # streamed bodies (ndjson pages, job events) are left alone so their
+    # lines still go out as soon as they're ready
+    if COMPRESS_LEVEL <= 0 or response.is_streamed or response.direct_passthrough:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304) or 'Content-Encoding' in response.headers:
+        return response
+    mimetype = response.mimetype or ''
+    if not (mimetype.startswith('text/') or mimetype in _COMPRESSIBLE):
+        return response
+    if response.content_length is not None and response.content_length < COMPRESS_MIN_BYTES:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    coding = negotiate(accept_encodings)
+    if coding is None:
+        return response
+
+    with span('compress'):
+        if coding == 'gzip':
+            data = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+        else:
+            data = zlib.compress(data, COMPRESS_LEVEL)
+    response.set_data(data)
+    response.headers['Content-Encoding'] = coding
+    return response
@@ -0,0 +1,29 @@
+import json
+import os
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# 'orjson' (the default when it's installed) or 'std'
+ENGINE = os.environ.get('PLAINSPEAK_JSON', 'orjson' if orjson is not None else 'std')
+
+
+def dumps(obj, sort_keys: bool = False, default=None) -> bytes:
+    # compact utf-8 json; orjson when available, with the stdlib for
+    # whatever it refuses (ints past 64 bits, types default can't handle)
+    if orjson is not None and ENGINE == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, default=default,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None and ENGINE == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,128 @@
+import json
+import os
+from collections import deque
+
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+GAZETTEER_PATH = os.environ.get('PLAINSPEAK_GAZETTEER', os.path.join(DATA_DIR, 'gazetteer.json'))
+
+
+def load_entries(path: str = GAZETTEER_PATH) -> list:
+    # {"Role": ["Name", ...], ...} -> [(name, role), ...] in file order, which
+    # is also the order hits are reported in
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    entries = []
+    seen = set()
+    for role, names in raw.items():
+        for name in names:
+            name = name.strip()
+            if name and name not in seen:
+                seen.add(name)
+                entries.append((name, role))
+    return entries
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class Gazetteer:
+    # Aho-Corasick automaton over every name: one pass over the text finds
+    # all of them, however many names there are. Matching is case-sensitive
+    # and needs a word boundary on both ends, like re's \b around each term.
+    # Uses the pyahocorasick C extension when it's installed.
+
+    def __init__(self, entries: list):
+        self.entries = list(entries)
+        self._lengths = [len(name) for name, _ in self.entries]
+        self._automaton = None
+        if ahocorasick is not None:
+            self._build_c()
+        else:
+            self._build_python()
+
+    def _build_c(self) -> None:
+        automaton = ahocorasick.Automaton()
+        for idx, (name, _) in enumerate(self.entries):
+            automaton.add_word(name, idx)
+        automaton.make_automaton()
+        self._automaton = automaton
+
+    def _build_python(self) -> None:
+        goto = [{}]
+        out = [[]]
+        for idx, (name, _) in enumerate(self.entries):
+            node = 0
+            for ch in name:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    out.append([])
+                    nxt = len(goto) - 1
+                    goto[node][ch] = nxt
+                node = nxt
+            out[node].append(idx)
+
+        # breadth-first so every node's failure target is finished first
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            u = queue.popleft()
+            for ch, v in goto[u].items():
+                queue.append(v)
+                f = fail[u]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[v] = target if target != v else 0
+                out[v] = out[v] + out[fail[v]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def _iter_raw(self, text: str):
+        # yields (entry index, end index inclusive) for every occurrence
+        if self._automaton is not None:
+            yield from ((idx, end) for end, idx in self._automaton.iter(text))
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for idx in out[node]:
+                yield idx, i
+
+    def _bounded(self, text: str, start: int, end: int) -> bool:
+        # \b on each side: word-ness has to change across the edge
+        if _is_word(text[start]) == (start > 0 and _is_word(text[start - 1])):
+            return False
+        after = end + 1
+        return _is_word(text[end]) != (after < len(text) and _is_word(text[after]))
+
+    def find(self, text: str) -> list:
+        # [(name, role), ...] for every entry present, in gazetteer order
+        if not text or not self.entries:
+            return []
+        hits = set()
+        for idx, end in self._iter_raw(text):
+            if idx in hits:
+                continue
+            if self._bounded(text, end - self._lengths[idx] + 1, end):
+                hits.add(idx)
+        return [self.entries[i] for i in sorted(hits)]
+
+
+_gazetteer = Gazetteer(load_entries())
+
+
+def find_entities(text: str) -> list:
+    return _gazetteer.find(text)
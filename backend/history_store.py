@@ -0,0 +1,93 @@
+import json
+import os
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    original_text TEXT NOT NULL,
+    simplified_text TEXT NOT NULL,
+    actions TEXT NOT NULL,
+    type TEXT NOT NULL
+)
+"""
+
+_COLUMNS = 'id, timestamp, original_text, simplified_text, actions, type'
+
+
+class HistoryStore:
+    # sqlite in WAL mode: readers don't block the writer, ids come from
+    # AUTOINCREMENT so concurrent requests never share one, and only
+    # max_items rows are kept so the table can't grow forever
+
+    def __init__(self, path: str, max_items: int = 10000, cache_kb: int = 2048):
+        self.path = path
+        self.max_items = max_items
+        self.cache_kb = cache_kb
+        self._local = threading.local()
+
+        with self._conn() as conn:
+            conn.execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread, and a fresh one after fork so worker
+        # processes never share a handle with their parent
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA cache_size=-{int(self.cache_kb)}')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add(self, item: dict) -> dict:
+        with self._conn() as conn:
+            cur = conn.execute(
+                'INSERT INTO history (timestamp, original_text, simplified_text, actions, type) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (
+                    item['timestamp'],
+                    item['original_text'],
+                    item['simplified_text'],
+                    json.dumps(item.get('actions') or [], ensure_ascii=False),
+                    item.get('type', 'text'),
+                ),
+            )
+            new_id = cur.lastrowid
+            if self.max_items:
+                conn.execute('DELETE FROM history WHERE id <= ?', (new_id - self.max_items,))
+        return dict(item, id=new_id)
+
+    def page(self, cursor: int = None, limit: int = 50) -> tuple:
+        # newest first; cursor is the last id the client saw
+        conn = self._conn()
+        if cursor:
+            rows = conn.execute(
+                f'SELECT {_COLUMNS} FROM history WHERE id < ? ORDER BY id DESC LIMIT ?',
+                (cursor, limit + 1),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                f'SELECT {_COLUMNS} FROM history ORDER BY id DESC LIMIT ?',
+                (limit + 1,),
+            ).fetchall()
+
+        items = [_row_to_item(r) for r in rows[:limit]]
+        next_cursor = items[-1]['id'] if len(rows) > limit else None
+        return items, next_cursor
+
+
+def _row_to_item(row) -> dict:
+    return {
+        'id': row['id'],
+        'timestamp': row['timestamp'],
+        'original_text': row['original_text'],
+        'simplified_text': row['simplified_text'],
+        'actions': json.loads(row['actions']),
+        'type': row['type'],
+    }
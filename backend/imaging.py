@@ -0,0 +1,201 @@
+import hashlib
+import io
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from functools import cached_property
+
+try:
+    from PIL import Image
+    from PIL.JpegImagePlugin import JpegImageFile
+except Exception:
+    Image = None
+    JpegImageFile = None
+
+OCR_MAX_PIXELS = int(os.environ.get('PLAINSPEAK_OCR_MAX_PIXELS', str(4_000_000)))
+OCR_TARGET_DPI = int(os.environ.get('PLAINSPEAK_OCR_TARGET_DPI', '300'))
+PDF_RASTERIZER = shutil.which('pdftoppm')
+PDF_INFO = shutil.which('pdfinfo')
+# uploads whose header claims more pixels than this are turned away before
+# anything is decoded; a 600 dpi letter page is about 34 million
+UPLOAD_MAX_PIXELS = int(os.environ.get('PLAINSPEAK_UPLOAD_MAX_PIXELS', str(60_000_000)))
+# request bodies bigger than this are spooled to a temp file, not held in memory
+UPLOAD_SPOOL_BYTES = int(os.environ.get('PLAINSPEAK_UPLOAD_SPOOL_BYTES', str(1024 * 1024)))
+
+
+class ImageTooLarge(Exception):
+    def __init__(self, size: tuple, max_pixels: int):
+        super().__init__(f'image is {size[0]}x{size[1]} pixels, the limit is {max_pixels}')
+        self.size = size
+        self.max_pixels = max_pixels
+
+
+class PreparedImage:
+    # the image tesseract should see, plus what's needed to map its boxes
+    # back onto the upload the client actually has
+
+    def __init__(self, image, original_size: tuple):
+        self.image = image
+        self.original_size = original_size
+        self.scale_x = original_size[0] / image.width
+        self.scale_y = original_size[1] / image.height
+
+    @cached_property
+    def pixel_hash(self) -> str:
+        # hash of what tesseract will actually read, so re-encoded or
+        # re-uploaded copies of the same picture still match
+        h = hashlib.sha256(f'{self.image.mode}:{self.image.size}'.encode('utf-8'))
+        h.update(self.image.tobytes())
+        return h.hexdigest()
+
+    @property
+    def size_dict(self) -> dict:
+        return {'w': self.original_size[0], 'h': self.original_size[1]}
+
+    def rescale_lines(self, lines: list) -> list:
+        if self.scale_x == 1 and self.scale_y == 1:
+            return lines
+        out = []
+        for ln in lines:
+            out.append(dict(
+                ln,
+                x=int(round(ln['x'] * self.scale_x)),
+                y=int(round(ln['y'] * self.scale_y)),
+                w=int(round(ln['w'] * self.scale_x)),
+                h=int(round(ln['h'] * self.scale_y)),
+            ))
+        return out
+
+
+def _target_scale(img, max_pixels: int, target_dpi: int) -> float:
+    w, h = img.size
+    scale = 1.0
+    if max_pixels and w * h > max_pixels:
+        scale = math.sqrt(max_pixels / (w * h))
+
+    # scans that say they're 600 dpi don't need to be read at 600 dpi
+    dpi = img.info.get('dpi')
+    if target_dpi and dpi:
+        try:
+            source_dpi = float(min(dpi))
+        except (TypeError, ValueError):
+            source_dpi = 0
+        if source_dpi > target_dpi:
+            scale = min(scale, target_dpi / source_dpi)
+    return scale
+
+
+def prepare_image(img, max_pixels: int = OCR_MAX_PIXELS, target_dpi: int = OCR_TARGET_DPI) -> PreparedImage:
+    original_size = img.size
+    scale = _target_scale(img, max_pixels, target_dpi)
+    target = (max(1, int(original_size[0] * scale)), max(1, int(original_size[1] * scale)))
+
+    # for jpegs, draft() lets the decoder skip straight to a 1/2, 1/4 or 1/8
+    # size grayscale image, so the full-size rgb frame is never built. Phone
+    # photos open as MPO, a JpegImageFile subclass, and get it too.
+    if isinstance(img, JpegImageFile):
+        img.draft('L', target)
+
+    img = img.convert('L')
+
+    if img.width > target[0] or img.height > target[1]:
+        img = img.resize(target, Image.BILINEAR, reducing_gap=2.0)
+
+    return PreparedImage(img, original_size)
+
+
+def check_pixel_budget(img, max_pixels: int = UPLOAD_MAX_PIXELS) -> None:
+    # Image.open only reads the header, so this runs before any pixel data
+    # is decoded
+    w, h = img.size
+    if max_pixels and w * h > max_pixels:
+        raise ImageTooLarge(img.size, max_pixels)
+
+
+def upload_file(stream):
+    # the upload as a file of our own at offset 0, so it stays readable
+    # after werkzeug closes the request's files (later pages of a multi-page
+    # upload are decoded while the response streams). A spooled upload is
+    # read from disk as the decoder asks for it, never held whole in memory.
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fd = None
+    if fd is None:
+        return io.BytesIO(stream.read())
+    fp = os.fdopen(os.dup(fd), 'rb')
+    fp.seek(0)
+    return fp
+
+
+def frame_count(img) -> int:
+    return getattr(img, 'n_frames', 1)
+
+
+def iter_frames(img, max_pixels: int = OCR_MAX_PIXELS, target_dpi: int = OCR_TARGET_DPI):
+    # multi-page tiffs: decode one frame at a time, as the caller asks for it
+    for i in range(frame_count(img)):
+        img.seek(i)
+        check_pixel_budget(img)
+        yield prepare_image(img.copy(), max_pixels, target_dpi)
+
+
+def is_pdf(content: bytes) -> bool:
+    return content[:5] == b'%PDF-'
+
+
+def pdf_rasterizer_available() -> bool:
+    return PDF_RASTERIZER is not None and PDF_INFO is not None
+
+
+_PDF_PAGE_SIZE = re.compile(r'^Page\s+\d+\s+size:\s+([\d.]+) x ([\d.]+) pts', re.M)
+
+
+def pdf_page_sizes(path: str, last: int = None) -> list:
+    # each page's (width, height) in points, from pdfinfo, up to page last.
+    # pdfinfo only reads the document's structure, nothing is rendered.
+    if last is None:
+        out = subprocess.run([PDF_INFO, path], check=True, capture_output=True, text=True).stdout
+        count = int(re.search(r'^Pages:\s+(\d+)', out, re.M).group(1))
+        last = count
+    out = subprocess.run([PDF_INFO, '-f', '1', '-l', str(last), path],
+                         check=True, capture_output=True, text=True).stdout
+    return [(float(w), float(h)) for w, h in _PDF_PAGE_SIZE.findall(out)]
+
+
+def iter_pdf_pages(fp, dpi: int = OCR_TARGET_DPI,
+                   max_pixels: int = OCR_MAX_PIXELS, max_pages: int = None):
+    # rasterizes with poppler's pdftoppm into a temp dir that lives exactly
+    # as long as this generator does, one page per step, so the first page
+    # is read while the rest haven't been rendered. With max_pages, goes one
+    # page past it (when there is one) so the caller can tell the document
+    # was cut short.
+    if PDF_RASTERIZER is None or PDF_INFO is None:
+        raise RuntimeError('PDF uploads need pdftoppm and pdfinfo (poppler-utils) on the server')
+
+    with tempfile.TemporaryDirectory(prefix='plainspeak-pdf-') as tmp:
+        src = os.path.join(tmp, 'in.pdf')
+        with open(src, 'wb') as f:
+            shutil.copyfileobj(fp, f)
+        fp.close()
+
+        sizes = pdf_page_sizes(src, max_pages + 1 if max_pages else None)
+        for number, (w, h) in enumerate(sizes, 1):
+            # the same guard image uploads get, before rendering: a page
+            # with a huge MediaBox would otherwise rasterize to gigabytes
+            size = (math.ceil(w * dpi / 72), math.ceil(h * dpi / 72))
+            if UPLOAD_MAX_PIXELS and size[0] * size[1] > UPLOAD_MAX_PIXELS:
+                raise ImageTooLarge(size, UPLOAD_MAX_PIXELS)
+
+            out = os.path.join(tmp, 'page')
+            subprocess.run([PDF_RASTERIZER, '-r', str(dpi), '-gray', '-png', '-singlefile',
+                            '-f', str(number), '-l', str(number), src, out],
+                           check=True, capture_output=True)
+            with Image.open(out + '.png') as page:
+                check_pixel_budget(page)
+                prepared = prepare_image(page, max_pixels, dpi)
+            os.remove(out + '.png')
+            yield prepared
@@ -0,0 +1,390 @@
+import hashlib
+import os
+import re
+import sys
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from classifier import classify
+from document import SENTENCE_BOUNDARY
+from metrics import span
+from readability import ReadabilityTally, sentence_stats, tally_report
+from simplifier import _action_text, _grade_settings, _join_simplified, _simplify_sentence
+
+SENTENCE_MEMO_BYTES = int(os.environ.get('PLAINSPEAK_SENTENCE_MEMO_BYTES', str(64 * 1024 * 1024)))
+# an OrderedDict slot with its links, per memo entry
+_ENTRY_OVERHEAD = 100
+# a memo key: the (digest, kind) tuple and the 20-byte digest
+_KEY_BYTES = sys.getsizeof((None, None)) + sys.getsizeof(bytes(20))
+
+_NON_SPACE = re.compile(r'\S')
+
+
+def _deep_bytes(value) -> int:
+    # sys.getsizeof through dicts, lists and tuples; strings and numbers
+    # shared with other structures are counted again, so it errs high
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_deep_bytes(k) + _deep_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_deep_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class SentenceMemo:
+    # per-sentence results keyed by (sha1 of the sentence, what was computed),
+    # so a resubmitted document only pays for the sentences that changed.
+    # Bounded by the measured size of its keys and values.
+
+    def __init__(self, max_bytes: int = SENTENCE_MEMO_BYTES):
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, sentences: list, kind, compute, size=sys.getsizeof) -> list:
+        # [compute(s) for s in sentences], reusing what's remembered; one
+        # lock round for the lookups and one for the stores. size(value)
+        # is what a computed value holds in bytes.
+        keys = [(hashlib.sha1(s.encode('utf-8')).digest(), kind) for s in sentences]
+        out = [None] * len(sentences)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    out[i] = self._memory[key][0]
+                else:
+                    missing.append(i)
+            self.hits += len(sentences) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return out
+
+        sizes = {}
+        for i in missing:
+            out[i] = compute(sentences[i])
+            sizes[i] = _KEY_BYTES + size(out[i]) + _ENTRY_OVERHEAD
+        with self._lock:
+            for i in missing:
+                old = self._memory.pop(keys[i], None)
+                if old is not None:
+                    self._bytes -= old[1]
+                self._memory[keys[i]] = (out[i], sizes[i])
+                self._bytes += sizes[i]
+            while self._bytes > self.max_bytes and self._memory:
+                _, (_, size) = self._memory.popitem(last=False)
+                self._bytes -= size
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._memory), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+_memo = SentenceMemo()
+
+
+def sentence_memo_stats() -> dict:
+    return _memo.stats()
+
+
+def _analyze(sentence: str) -> tuple:
+    # (action item or None, readability stats or None) for one sentence;
+    # the item is extract_action_items' (action text, deadline) pair plus
+    # the key it dedups on
+    labels = classify(sentence)
+    a = _action_text(sentence, labels)
+    item = (a, labels.deadline, a.lower()) if a is not None else None
+    return item, sentence_stats(sentence)
+
+
+def _analysis_bytes(entry: tuple, sentence: str = None) -> int:
+    # an _analyze result: its tuples and the action strings, less the action
+    # text when it's the sentence itself, already counted by the caller
+    item, stats = entry
+    n = sys.getsizeof(entry)
+    if stats is not None:
+        n += sys.getsizeof(stats)
+    if item is not None:
+        n += sys.getsizeof(item) + sys.getsizeof(item[2])
+        if item[0] != sentence:
+            n += sys.getsizeof(item[0])
+        if item[1] is not None:
+            n += sys.getsizeof(item[1])
+    return n
+
+
+def _sentence_bytes(sentence: str, entry: tuple) -> int:
+    # what one sentence holds in a state: its text, its start offset, the
+    # three list slots pointing at them and its analysis (the response's
+    # actions list points at the same action strings)
+    return sys.getsizeof(sentence) + 32 + 3 * 8 + _analysis_bytes(entry, sentence)
+
+
+def _response_bytes(response: dict) -> int:
+    # a stored response's own share: original_text is the state's text and
+    # the action strings are the state's too
+    n = sys.getsizeof(response)
+    for key, value in response.items():
+        if key == 'original_text':
+            n += sys.getsizeof(key)
+        elif key == 'actions':
+            n += sys.getsizeof(key) + sys.getsizeof(value)
+        else:
+            n += _deep_bytes(key) + _deep_bytes(value)
+    return n
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # big slices first, so a long unchanged head costs a few memcmps
+    n = min(len(a), len(b))
+    i = 0
+    for step in (65536, 1024, 16, 1):
+        while i + step <= n and a[i:i + step] == b[i:i + step]:
+            i += step
+    return i
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    la, lb = len(a), len(b)
+    i = 0
+    for step in (65536, 1024, 16, 1):
+        while i + step <= limit and a[la - i - step:la - i] == b[lb - i - step:lb - i]:
+            i += step
+    return i
+
+
+def _split_window(text: str, start: int, end: int) -> tuple:
+    # (sentences, starts) for text[start:end], which begins and ends on a
+    # sentence edge; the same pieces Document would cut there, in one pass
+    window = text[start:end]
+    sentences = []
+    starts = []
+    last = 0
+    for m in SENTENCE_BOUNDARY.finditer(window):
+        sentences.append(window[last:m.start()])
+        starts.append(start + last)
+        last = m.end()
+    sentences.append(window[last:])
+    starts.append(start + last)
+    return sentences, starts
+
+
+class SimplifyState:
+    # what /simplify worked out for one text, sentence by sentence, so an
+    # edited version can be redone from the sentences around the edit.
+    # starts are each sentence's offset in the unstripped text.
+
+    __slots__ = ('text', 'target_grade', 'sentences', 'starts', 'analysis', 'before', 'simplified', 'sentence_bytes')
+
+    def __init__(self, text, target_grade, sentences, starts, analysis, before, sentence_bytes):
+        # sentence_bytes: _sentence_bytes summed over the sentences, kept up
+        # to date by edit() from the replaced sentences alone
+        self.text = text
+        self.sentence_bytes = sentence_bytes
+        self.target_grade = target_grade
+        self.sentences = sentences
+        self.starts = starts
+        self.analysis = analysis
+        self.before = before
+        num_sentences, simplify_vocab, max_words = _grade_settings(target_grade)
+        # the first few sentences are all the simplified text ever uses
+        with span('simplify'):
+            simplified = _memo.get_many(
+                sentences[:num_sentences], ('simplify', simplify_vocab, max_words),
+                lambda s: _simplify_sentence(s, simplify_vocab, max_words))
+        self.simplified = [s for s in simplified if s is not None]
+
+    @classmethod
+    def build(cls, text: str, target_grade) -> 'SimplifyState':
+        with span('sentence_split'):
+            first = _NON_SPACE.search(text)
+            if first is None:
+                # what Document gives blank text
+                sentences, starts = ([''], [len(text)]) if text else ([], [])
+            else:
+                sentences, starts = _split_window(text, first.start(), len(text.rstrip()))
+        with span('sentence_analysis'):
+            analysis = _memo.get_many(sentences, 'analysis', _analyze, _analysis_bytes)
+            before = ReadabilityTally()
+            for _, stats in analysis:
+                if stats is not None:
+                    before.add_stats(stats)
+        sentence_bytes = sum(_sentence_bytes(s, entry) for s, entry in zip(sentences, analysis))
+        return cls(text, target_grade, sentences, starts, analysis, before, sentence_bytes)
+
+    def actions(self) -> list:
+        # same order and dedup as extract_actions
+        seen = set()
+        actions = []
+        for item, _ in self.analysis:
+            if item is None:
+                continue
+            key = item[2]
+            if key not in seen:
+                seen.add(key)
+                actions.append(item[0])
+        return actions
+
+    def result(self) -> dict:
+        # the fields of a simplify response that depend on the text
+        simplified_text = _join_simplified(self.simplified) or self.text[:200]
+        after = ReadabilityTally()
+        for s in self.simplified or [simplified_text]:
+            after.add(s)
+        return {
+            'simplified_text': simplified_text,
+            'actions': self.actions(),
+            'readability': tally_report(self.before, after, self.target_grade),
+        }
+
+    def _index(self, pos: int) -> int:
+        # the sentence pos falls in (or the gap before it)
+        return max(0, bisect_right(self.starts, pos) - 1)
+
+    def edit(self, text: str) -> tuple:
+        # (state for text, {'start', 'removed', 'added'}): the sentences from
+        # start on that were replaced. Only the sentences touching the
+        # changed span, plus one either side since the edit can move a
+        # boundary, are re-split and re-analysed; the rest are carried over.
+        old = self.text
+        if text == old:
+            return self, {'start': 0, 'removed': 0, 'added': 0}
+        if _NON_SPACE.search(old) is None or _NON_SPACE.search(text) is None:
+            state = SimplifyState.build(text, self.target_grade)
+            return state, {'start': 0, 'removed': len(self.sentences), 'added': len(state.sentences)}
+
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        delta = len(text) - len(old)
+        last = len(self.sentences) - 1
+        first = max(0, self._index(prefix) - 1)
+        stop = min(last, self._index(len(old) - suffix) + 1)
+
+        # a window edge that isn't the text's own edge is the start of an
+        # unchanged sentence (left) or the end of one (right)
+        if first == 0:
+            start = _NON_SPACE.search(text).start()
+        else:
+            start = self.starts[first]
+        if stop == last:
+            end = len(text.rstrip())
+        else:
+            end = self.starts[stop] + len(self.sentences[stop]) + delta
+
+        sentences, starts = _split_window(text, start, end)
+        analysis = _memo.get_many(sentences, 'analysis', _analyze, _analysis_bytes)
+
+        before = self.before.copy()
+        sentence_bytes = self.sentence_bytes
+        for s, entry in zip(self.sentences[first:stop + 1], self.analysis[first:stop + 1]):
+            if entry[1] is not None:
+                before.add_stats(entry[1], -1)
+            sentence_bytes -= _sentence_bytes(s, entry)
+        for s, entry in zip(sentences, analysis):
+            if entry[1] is not None:
+                before.add_stats(entry[1])
+            sentence_bytes += _sentence_bytes(s, entry)
+
+        state = SimplifyState(
+            text, self.target_grade,
+            self.sentences[:first] + sentences + self.sentences[stop + 1:],
+            self.starts[:first] + starts + [s + delta for s in self.starts[stop + 1:]],
+            self.analysis[:first] + analysis + self.analysis[stop + 1:],
+            before, sentence_bytes,
+        )
+        return state, {'start': first, 'removed': stop + 1 - first, 'added': len(sentences)}
+
+    def size(self) -> int:
+        # bytes held: the text, the per-sentence data and the simplified
+        # sentences, plus the four lists' headers
+        return (sys.getsizeof(self.text) + self.sentence_bytes + _deep_bytes(self.simplified)
+                + 4 * sys.getsizeof([]))
+
+
+class EditStates:
+    # the last results' states by result id, least recently used out first
+    # once their measured size passes max_bytes. States from successive
+    # edits share their unchanged sentences, so this errs high.
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._states = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, result_id: str):
+        # (state, response) or None
+        with self._lock:
+            entry = self._states.get(result_id)
+            if entry is None:
+                return None
+            self._states.move_to_end(result_id)
+            return entry[:2]
+
+    def put(self, result_id: str, state: SimplifyState, response: dict) -> None:
+        size = state.size() + _response_bytes(response) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._states.pop(result_id, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._states[result_id] = (state, response, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._states.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'states': len(self._states), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+def merge_patch(old: dict, new: dict, skip=(), nulls=None, path=()) -> dict:
+    # a JSON merge patch (RFC 7386) turning old into new: changed keys with
+    # their new value, nested dicts patched key by key, dropped keys as None.
+    # A merge patch can't set a key to null (null deletes it), so keys whose
+    # new value is None are left out and their paths appended to nulls.
+    patch = {}
+    for key, value in new.items():
+        if key in skip or (key in old and old[key] == value):
+            continue
+        if value is None:
+            if nulls is not None:
+                nulls.append(list(path) + [key])
+        elif isinstance(value, dict) and isinstance(old.get(key), dict):
+            patch[key] = merge_patch(old[key], value, nulls=nulls, path=path + (key,))
+        else:
+            patch[key] = value
+    for key in old:
+        if key not in new and key not in skip:
+            patch[key] = None
+    return patch
+
+
+def list_splice(old: list, new: list) -> dict:
+    # {'start', 'delete', 'insert'} taking old to new: new is
+    # old[:start] + insert + old[start + delete:]
+    n = min(len(old), len(new))
+    start = 0
+    while start < n and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < n - start and old[len(old) - 1 - end] == new[len(new) - 1 - end]:
+        end += 1
+    return {'start': start, 'delete': len(old) - start - end, 'insert': new[start:len(new) - end]}
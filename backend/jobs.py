@@ -0,0 +1,123 @@
+import math
+import threading
+import time
+import uuid
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+
+
+class JobTableFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__('job table is full')
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.created = time.time()
+        self.finished = None
+        self.result = None
+        self.error = None
+        # bumped on every change so event streams can tell what they've sent
+        self.version = 0
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+    def to_dict(self) -> dict:
+        out = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created': int(self.created),
+        }
+        if self.status == DONE:
+            out['result'] = self.result
+        if self.status == ERROR:
+            out['error'] = self.error
+        return out
+
+
+class JobTable:
+    # finished jobs are dropped ttl seconds after they finish, and the table
+    # never holds more than max_jobs, so polling clients can't leak memory:
+    # when it's full of unfinished jobs, create() raises JobTableFull
+
+    def __init__(self, ttl: float = 300, max_jobs: int = 1000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._changed = threading.Condition()
+        # for the Retry-After guess
+        self._finished_count = 0
+        self._finished_seconds = 0.0
+
+    def create(self, kind: str) -> Job:
+        job = Job(kind)
+        with self._changed:
+            self._purge()
+            if len(self._jobs) >= self.max_jobs:
+                # make room by dropping the oldest finished job, if any
+                finished = [j for j in self._jobs.values() if j.is_finished]
+                if not finished:
+                    raise JobTableFull(self._retry_after())
+                del self._jobs[min(finished, key=lambda j: j.finished).id]
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str):
+        with self._changed:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def discard(self, job: Job) -> None:
+        with self._changed:
+            self._jobs.pop(job.id, None)
+
+    def mark_running(self, job: Job) -> None:
+        self._update(job, RUNNING)
+
+    def finish(self, job: Job, result) -> None:
+        self._update(job, DONE, result=result)
+
+    def fail(self, job: Job, error: str) -> None:
+        self._update(job, ERROR, error=error)
+
+    def wait(self, job: Job, seen_version: int, timeout: float) -> bool:
+        # blocks until the job changes past seen_version; False on timeout
+        with self._changed:
+            return self._changed.wait_for(lambda: job.version != seen_version, timeout=timeout)
+
+    def _update(self, job: Job, status: str, result=None, error=None) -> None:
+        with self._changed:
+            job.status = status
+            if status in (DONE, ERROR):
+                job.finished = time.time()
+                job.result = result
+                job.error = error
+                self._finished_count += 1
+                self._finished_seconds += job.finished - job.created
+            job.version += 1
+            self._changed.notify_all()
+
+    def _retry_after(self) -> int:
+        # rough guess: how long a job takes, so about when one frees a slot
+        avg = self._finished_seconds / self._finished_count if self._finished_count else 2.0
+        return max(1, math.ceil(avg))
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [k for k, j in self._jobs.items() if j.is_finished and j.finished < cutoff]
+        for k in expired:
+            del self._jobs[k]
+
+    def __len__(self):
+        with self._changed:
+            return len(self._jobs)
@@ -0,0 +1,300 @@
+import bisect
+import contextvars
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except Exception:
+    resource = None
+
+METRICS_ENABLED = os.environ.get('PLAINSPEAK_METRICS', '1') != '0'
+# adds a Server-Timing header with the stage breakdown to every response
+SERVER_TIMING = os.environ.get('PLAINSPEAK_SERVER_TIMING', '0') == '1'
+
+# seconds; from sub-millisecond text stages up to slow OCR pages
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RSS_BUCKETS = tuple(mb * 1024 * 1024 for mb in (32, 64, 128, 256, 512, 1024, 2048, 4096))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(x) -> str:
+    if x == float('inf'):
+        return '+Inf'
+    return repr(float(x)) if isinstance(x, float) else str(x)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        out = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(k, list(v[0]), v[1], v[2]) for k, v in sorted(self._series.items())]
+        for labels, counts, total, count in series:
+            running = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                running += n
+                le = 'le="' + _number(bound) + '"'
+                out.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}')
+            out.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            out.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return out
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        out = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            out.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return out
+
+
+class Collected:
+    # a metric read off some other component's stats() at scrape time;
+    # fn returns {label values tuple: number}
+    def __init__(self, name: str, help: str, kind: str, labelnames: tuple, fn):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def render(self) -> list:
+        out = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        try:
+            values = self.fn()
+        except Exception:
+            return out
+        for labels, value in sorted(values.items()):
+            out.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def collect(self, name: str, help: str, kind: str, labelnames: tuple, fn) -> Collected:
+        return self._add(Collected(name, help, kind, labelnames, fn))
+
+    def render(self) -> str:
+        # Prometheus text exposition format, version 0.0.4
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'plainspeak_stage_seconds', 'Time spent in each pipeline stage, summed per request.', ('stage',))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'plainspeak_request_seconds', 'Request latency by route, not counting streamed bodies.', ('route',))
+REQUESTS_TOTAL = REGISTRY.counter(
+    'plainspeak_requests_total', 'Requests by route and status code.', ('route', 'status'))
+PEAK_RSS_BYTES = REGISTRY.histogram(
+    'plainspeak_request_peak_rss_bytes', 'Peak resident memory of the process while a watched request ran.',
+    ('route',), RSS_BUCKETS)
+
+
+def peak_rss_bytes() -> int:
+    # VmHWM where there is a /proc, else the lifetime peak from getrusage
+    try:
+        with open('/proc/self/status', 'rb') as f:
+            for row in f:
+                if row.startswith(b'VmHWM:'):
+                    return int(row.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _reset_peak_rss() -> None:
+    # linux only: writing 5 to clear_refs resets VmHWM to the current RSS
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+# the peak is per process, so it is only reset when no other watched
+# request is running; with several at once each sees the shared peak
+_rss_lock = threading.Lock()
+_rss_watching = 0
+
+
+class RequestTimings:
+    # stage -> seconds for one request, in the order stages first ran. The
+    # request flushes it into the histograms when it ends; spans that finish
+    # after that (streamed responses, async OCR jobs) go straight in.
+
+    __slots__ = ('started', 'stages', 'closed', 'watch_rss', 'peak_rss')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.closed = False
+        self.watch_rss = False
+        self.peak_rss = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        parts = [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in self.stages.items()]
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+_current = contextvars.ContextVar('plainspeak_request_timings', default=None)
+
+
+def record(stage: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None and not timings.closed:
+        timings.add(stage, seconds)
+    else:
+        STAGE_SECONDS.observe(seconds, (stage,))
+
+
+class _Span:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage: str):
+    # with span('tesseract'): ... -- nested and repeated spans are fine;
+    # repeats of a stage within one request add up
+    if not METRICS_ENABLED:
+        return _NO_SPAN
+    return _Span(stage)
+
+
+def begin_request(watch_rss: bool = False) -> RequestTimings:
+    # watch_rss also tracks the process's peak RSS until the request ends
+    global _rss_watching
+    timings = RequestTimings()
+    if watch_rss:
+        with _rss_lock:
+            if _rss_watching == 0:
+                _reset_peak_rss()
+            _rss_watching += 1
+        timings.watch_rss = True
+    _current.set(timings)
+    return timings
+
+
+def end_rss_watch(timings: RequestTimings):
+    # returns the peak in bytes, or None if the request wasn't watched;
+    # safe to call more than once
+    global _rss_watching
+    if timings is None or not timings.watch_rss:
+        return None
+    timings.watch_rss = False
+    timings.peak_rss = peak_rss_bytes()
+    with _rss_lock:
+        _rss_watching -= 1
+    return timings.peak_rss
+
+
+def current_request():
+    return _current.get()
+
+
+def end_request(timings: RequestTimings, route: str, status: int) -> float:
+    # returns the request's elapsed seconds
+    elapsed = time.perf_counter() - timings.started
+    timings.closed = True
+    for stage, seconds in list(timings.stages.items()):
+        STAGE_SECONDS.observe(seconds, (stage,))
+    REQUEST_SECONDS.observe(elapsed, (route,))
+    REQUESTS_TOTAL.inc((route, str(status)))
+    peak = end_rss_watch(timings)
+    if peak is not None:
+        PEAK_RSS_BYTES.observe(peak, (route,))
+    return elapsed
@@ -0,0 +1,102 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    # coalesces calls that arrive close together into one call of
+    # batch_fn(key, items) -> [result, ...] (same order as items). The worker
+    # takes the first waiting item, then keeps collecting for up to
+    # max_wait_ms or until max_batch items are in hand. Items only share a
+    # call with others that have the same key; mixed keys in one window are
+    # split into one call per key.
+
+    def __init__(self, batch_fn, max_batch: int = 8, max_wait_ms: float = 5.0, name: str = 'microbatch'):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+
+    def _ensure_worker(self) -> None:
+        # threads don't survive a fork, so a forked worker process starts
+        # its own the first time it submits
+        pid = os.getpid()
+        if self._worker is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._worker is None or self._pid != pid:
+                self._queue = queue.Queue()
+                self._pid = pid
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def submit(self, key, item) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((key, item, future))
+        return future
+
+    def __call__(self, key, item):
+        return self.submit(key, item).result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # whatever is already queued rides along for free
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            groups = {}
+            for key, item, future in batch:
+                groups.setdefault(key, []).append((item, future))
+
+            for key, entries in groups.items():
+                live = [(item, f) for item, f in entries if f.set_running_or_notify_cancel()]
+                if not live:
+                    continue
+                items = [item for item, _ in live]
+                futures = [f for _, f in live]
+                with self._lock:
+                    self.batches += 1
+                    self.items += len(items)
+                    self.largest = max(self.largest, len(items))
+                try:
+                    results = self.batch_fn(key, items)
+                except BaseException as e:
+                    for f in futures:
+                        f.set_exception(e)
+                    continue
+                for f, result in zip(futures, results):
+                    f.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+                'batches': self.batches,
+                'items': self.items,
+                'largest_batch': self.largest,
+                'avg_batch': round(self.items / self.batches, 2) if self.batches else None,
+                'queued': self._queue.qsize(),
+            }
@@ -0,0 +1,152 @@
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+def _column(data: dict, name: str, n: int, default):
+    col = data.get(name)
+    if col is None or len(col) < n:
+        return [default] * n
+    return col
+
+
+def parse_tsv(tsv: str) -> dict:
+    # tesseract's tsv output as a dict of columns; mirrors pytesseract's
+    # file_to_dict, so it looks like image_to_data(..., output_type=Output.DICT)
+    rows = [row.split('\t') for row in tsv.strip().split('\n')]
+    header = rows.pop(0)
+    if rows and len(rows[-1]) < len(header):
+        rows[-1].append('')
+    text_col = header.index('text')
+
+    result = {}
+    for i, head in enumerate(header):
+        result[head] = []
+        for row in rows:
+            if len(row) <= i:
+                continue
+            val = row[i]
+            if i != text_col:
+                try:
+                    val = int(float(val))
+                except ValueError:
+                    pass
+            result[head].append(val)
+    return result
+
+
+def assemble_lines(data: dict) -> tuple:
+    # turns pytesseract's image_to_data dict into (lines, full_text); words
+    # are grouped by (block_num, line_num) in order of first appearance and
+    # lines are sorted by (y, x)
+    texts = data.get('text', [])
+    n = len(texts)
+    if not n:
+        return [], ''
+    if np is None:
+        return _assemble_lines_python(data, texts, n)
+    return _assemble_lines_numpy(data, texts, n)
+
+
+def _assemble_lines_numpy(data: dict, texts: list, n: int) -> tuple:
+    # int() truncates toward zero, so -0.5 still counts as a real word
+    conf = np.trunc(np.fromiter(_column(data, 'conf', n, -1), dtype=np.float64, count=n))
+    candidates = np.flatnonzero(conf >= 0)
+
+    # only strip the rows that survived the confidence mask
+    stripped = [(texts[i] or '').strip() for i in candidates.tolist()]
+    words = np.array(stripped, dtype=object)
+    has_text = words != ''
+    if not has_text.any():
+        return [], ''
+    idx = candidates[has_text]
+    words = words[has_text]
+
+    def col(name):
+        return np.fromiter(_column(data, name, n, 0), dtype=np.int64, count=n)[idx]
+
+    block = col('block_num')
+    line = col('line_num')
+    left = col('left')
+    top = col('top')
+    right = left + col('width')
+    bottom = top + col('height')
+
+    # group id per word, numbered by first appearance like a dict would be
+    low = int(line.min())
+    key = block * (int(line.max()) - low + 1) + (line - low)
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    group = rank[inverse.reshape(-1)]
+
+    # stable sort keeps words in reading order inside each group
+    order = np.argsort(group, kind='stable')
+    group = group[order]
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    ends = np.r_[starts[1:], len(group)]
+
+    x1 = np.minimum.reduceat(left[order], starts).tolist()
+    y1 = np.minimum.reduceat(top[order], starts).tolist()
+    x2 = np.maximum.reduceat(right[order], starts).tolist()
+    y2 = np.maximum.reduceat(bottom[order], starts).tolist()
+    ordered_words = words[order].tolist()
+
+    lines = []
+    for g, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+        lines.append({
+            'text': ' '.join(ordered_words[s:e]).strip(),
+            'x': x1[g],
+            'y': y1[g],
+            'w': x2[g] - x1[g],
+            'h': y2[g] - y1[g],
+        })
+    lines.sort(key=lambda d: (d['y'], d['x']))
+    full_text = '\n'.join(l['text'] for l in lines if l['text'])
+    return lines, full_text
+
+
+def _assemble_lines_python(data: dict, texts: list, n: int) -> tuple:
+    # same result without numpy: pull each column out once, then one pass
+    columns = zip(
+        texts,
+        _column(data, 'conf', n, '-1'),
+        _column(data, 'block_num', n, 0),
+        _column(data, 'line_num', n, 0),
+        _column(data, 'left', n, 0),
+        _column(data, 'top', n, 0),
+        _column(data, 'width', n, 0),
+        _column(data, 'height', n, 0),
+    )
+    by_line = {}
+    for txt, conf, block, line, left, top, width, height in columns:
+        txt = (txt or '').strip()
+        if not txt or int(float(conf)) < 0:
+            continue
+        entry = by_line.get((block, line))
+        if entry is None:
+            by_line[(block, line)] = [[txt], left, top, left + width, top + height]
+            continue
+        entry[0].append(txt)
+        if left < entry[1]:
+            entry[1] = left
+        if top < entry[2]:
+            entry[2] = top
+        if left + width > entry[3]:
+            entry[3] = left + width
+        if top + height > entry[4]:
+            entry[4] = top + height
+
+    lines = []
+    for words, x1, y1, x2, y2 in by_line.values():
+        lines.append({
+            'text': ' '.join(words).strip(),
+            'x': int(x1),
+            'y': int(y1),
+            'w': int(x2 - x1),
+            'h': int(y2 - y1),
+        })
+    lines.sort(key=lambda d: (d['y'], d['x']))
+    full_text = '\n'.join(l['text'] for l in lines if l['text'])
+    return lines, full_text
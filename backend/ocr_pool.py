@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class OCRQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__('ocr queue is full')
+        self.retry_after = retry_after
+
+
+class OCRPool:
+    # tesseract runs as a subprocess, so threads are enough to drive it; the
+    # point of the pool is to cap how many run at once and how many wait
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr')
+        # admission (running or waiting) and running, shared by the threaded
+        # jobs and arun's coroutines so one process never runs more than
+        # `workers` tesseracts whichever server it's behind
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+        self._run_slots = threading.BoundedSemaphore(self.workers)
+        # threads parked on _run_slots for arun callers; never more than
+        # the queue can hold
+        self._waiters = ThreadPoolExecutor(max_workers=self.workers + self.queue_depth, thread_name_prefix='ocr-wait')
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def submit(self, fn, *args, on_start=None) -> Future:
+        # the future resolves to (result, {'wait_ms': ..., 'ocr_ms': ...});
+        # raises OCRQueueFull right away instead of queueing without limit
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise OCRQueueFull(self._retry_after())
+
+        with self._lock:
+            self.in_flight += 1
+        submitted = time.perf_counter()
+        # run in the submitter's context, so per-request state like the
+        # stage timings follows the job onto the worker thread
+        context = contextvars.copy_context()
+
+        def job():
+            with self._run_slots:
+                started = time.perf_counter()
+                with self._lock:
+                    self.running += 1
+                try:
+                    if on_start is not None:
+                        on_start()
+                    result = context.run(fn, *args)
+                finally:
+                    finished = time.perf_counter()
+                    with self._lock:
+                        self.running -= 1
+            timing = {
+                'wait_ms': round((started - submitted) * 1000, 1),
+                'ocr_ms': round((finished - started) * 1000, 1),
+            }
+            return result, timing
+
+        future = self._executor.submit(job)
+        future.add_done_callback(self._job_done)
+        return future
+
+    def run(self, fn, *args):
+        # blocking form of submit, for the synchronous endpoints
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        # run for the asyncio server: awaits the coroutine function fn
+        # under the same slots as submit(), without holding a pool thread
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise OCRQueueFull(self._retry_after())
+
+        with self._lock:
+            self.in_flight += 1
+        submitted = time.perf_counter()
+        timing = None
+        try:
+            await self._acquire_run_slot()
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+            try:
+                result = await fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                self._run_slots.release()
+            timing = {
+                'wait_ms': round((started - submitted) * 1000, 1),
+                'ocr_ms': round((finished - started) * 1000, 1),
+            }
+            return result, timing
+        finally:
+            self._record(timing)
+
+    async def _acquire_run_slot(self) -> None:
+        if self._run_slots.acquire(blocking=False):
+            return
+        waiter = asyncio.get_running_loop().run_in_executor(self._waiters, self._run_slots.acquire)
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # the slot still arrives; hand it straight back
+            waiter.add_done_callback(lambda _: self._run_slots.release())
+            raise
+
+    def _job_done(self, future) -> None:
+        self._record(None if future.exception() is not None else future.result()[1])
+
+    def _record(self, timing) -> None:
+        # timing is None for a failed job
+        with self._lock:
+            self.in_flight -= 1
+            if timing is None:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self.wait_seconds += timing['wait_ms'] / 1000
+                self.run_seconds += timing['ocr_ms'] / 1000
+        self._slots.release()
+
+    def _retry_after(self) -> int:
+        # rough guess: how long until the current backlog drains
+        with self._lock:
+            avg = self.run_seconds / self.completed if self.completed else 2.0
+            backlog = self.in_flight
+        return max(1, math.ceil(avg * backlog / self.workers))
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'running': self.running,
+                'queued': self.in_flight - self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds / done * 1000, 1),
+                'avg_ocr_ms': round(self.run_seconds / done * 1000, 1),
+            }
+
+
+def pool_from_env() -> OCRPool:
+    workers = int(os.environ.get('PLAINSPEAK_OCR_WORKERS', '0')) or (os.cpu_count() or 1)
+    queue_depth = int(os.environ.get('PLAINSPEAK_OCR_QUEUE', str(workers * 2)))
+    return OCRPool(workers, queue_depth)
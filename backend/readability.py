@@ -0,0 +1,170 @@
+import json
+import math
+import os
+import re
+from functools import lru_cache
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+EASY_WORDS_PATH = os.environ.get('PLAINSPEAK_EASY_WORDS', os.path.join(DATA_DIR, 'easy_words.json'))
+
+WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+VOWEL_GROUP = re.compile(r'[aeiouy]+')
+
+# Dale-Chall counts regular inflections of a listed word as familiar too
+_INFLECTIONS = ('s', 'es', 'ed', 'd', 'ing', 'er', 'est', 'ly')
+
+
+def load_easy_words(path: str = EASY_WORDS_PATH) -> frozenset:
+    # ["word", ...] -> every word plus its regular inflections, so checking a
+    # word at scoring time is one set lookup
+    with open(path, 'r', encoding='utf-8') as f:
+        base = {w.strip().lower() for w in json.load(f) if w.strip()}
+    easy = set(base)
+    for w in base:
+        stem = w[:-1] if w.endswith('e') else w
+        for suffix in _INFLECTIONS:
+            easy.add(w + suffix)
+            if suffix[0] in 'aeiouy':
+                easy.add(stem + suffix)
+        if w.endswith('y') and len(w) > 2 and w[-2] not in 'aeiou':
+            easy.update((w[:-1] + 'ies', w[:-1] + 'ied', w[:-1] + 'ier', w[:-1] + 'iest', w[:-1] + 'ily'))
+    return frozenset(easy)
+
+
+EASY_WORDS = load_easy_words()
+
+
+def count_syllables(word: str) -> int:
+    # vowel groups, minus a silent final e, never less than one
+    word = word.lower().replace("'", '')
+    n = len(VOWEL_GROUP.findall(word))
+    if n > 1 and word.endswith('e') and not word.endswith(('le', 'ee', 'ye')):
+        n -= 1
+    # "jumped", "makes": the ending adds no syllable, unlike "wanted", "boxes"
+    if n > 1 and len(word) > 3:
+        if word.endswith('ed') and word[-3] not in 'aeioudt':
+            n -= 1
+        elif word.endswith('es') and word[-3] not in 'aeiouszxhcg':
+            n -= 1
+    return max(1, n)
+
+
+@lru_cache(maxsize=65536)
+def _word_stats(word: str) -> tuple:
+    # (syllables, is_easy) for a lowercased word; the same few hundred words
+    # make up most of any text, so nearly every lookup is a hit
+    return count_syllables(word), word in EASY_WORDS
+
+
+def _round(x: float) -> float:
+    return round(x, 2)
+
+
+def sentence_stats(sentence: str):
+    # (words, syllables, polysyllables, difficult words), or None for a
+    # sentence without words, which doesn't count as a sentence either
+    words = WORD.findall(sentence)
+    if not words:
+        return None
+    syllables = polysyllables = difficult = 0
+    for w in words:
+        n, easy = _word_stats(w.lower())
+        syllables += n
+        if n >= 3:
+            polysyllables += 1
+        if not easy:
+            difficult += 1
+    return len(words), syllables, polysyllables, difficult
+
+
+class ReadabilityTally:
+    # running counts for the metrics; add() sentences as they come (the
+    # streaming endpoint never has the whole text) and read scores() at the end
+
+    __slots__ = ('sentences', 'words', 'syllables', 'polysyllables', 'difficult')
+
+    def __init__(self):
+        self.sentences = 0
+        self.words = 0
+        self.syllables = 0
+        self.polysyllables = 0
+        self.difficult = 0
+
+    def add(self, sentence: str) -> None:
+        stats = sentence_stats(sentence)
+        if stats is not None:
+            self.add_stats(stats)
+
+    def add_stats(self, stats: tuple, sign: int = 1) -> None:
+        # sign=-1 takes a sentence back out, for re-scoring an edited text
+        words, syllables, polysyllables, difficult = stats
+        self.sentences += sign
+        self.words += sign * words
+        self.syllables += sign * syllables
+        self.polysyllables += sign * polysyllables
+        self.difficult += sign * difficult
+
+    def copy(self) -> 'ReadabilityTally':
+        other = ReadabilityTally()
+        other.sentences = self.sentences
+        other.words = self.words
+        other.syllables = self.syllables
+        other.polysyllables = self.polysyllables
+        other.difficult = self.difficult
+        return other
+
+    def scores(self) -> dict:
+        if not self.words:
+            return {
+                'words': 0,
+                'sentences': 0,
+                'flesch_reading_ease': None,
+                'flesch_kincaid_grade': None,
+                'smog_index': None,
+                'dale_chall': None,
+                'difficult_words': 0,
+            }
+
+        words_per_sentence = self.words / self.sentences
+        syllables_per_word = self.syllables / self.words
+        pct_difficult = 100 * self.difficult / self.words
+        dale_chall = 0.1579 * pct_difficult + 0.0496 * words_per_sentence
+        if pct_difficult > 5:
+            dale_chall += 3.6365
+
+        return {
+            'words': self.words,
+            'sentences': self.sentences,
+            'flesch_reading_ease': _round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word),
+            'flesch_kincaid_grade': _round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59),
+            'smog_index': _round(1.043 * math.sqrt(self.polysyllables * 30 / self.sentences) + 3.1291),
+            'dale_chall': _round(dale_chall),
+            'difficult_words': self.difficult,
+        }
+
+
+def score_sentences(sentences) -> dict:
+    # every metric from one pass over the words of the given sentences
+    tally = ReadabilityTally()
+    for sentence in sentences:
+        tally.add(sentence)
+    return tally.scores()
+
+
+def _meets_target(after: dict, target_grade):
+    grade = after['flesch_kincaid_grade']
+    try:
+        return grade is not None and grade <= float(target_grade)
+    except (TypeError, ValueError):
+        return None
+
+
+def readability_report(before_sentences, after_sentences, target_grade) -> dict:
+    # the 'readability' field of a simplify response
+    after = score_sentences(after_sentences)
+    return {'before': score_sentences(before_sentences), 'after': after, 'meets_target': _meets_target(after, target_grade)}
+
+
+def tally_report(before: ReadabilityTally, after: ReadabilityTally, target_grade) -> dict:
+    scores = after.scores()
+    return {'before': before.scores(), 'after': scores, 'meets_target': _meets_target(scores, target_grade)}
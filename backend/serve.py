@@ -0,0 +1,333 @@
+# production entry point: a pre-fork server for app.py
+#
+# the master imports the app once (regexes, vocabulary trie, gazetteer
+# automaton, label scanner, easy-word set and, if present, the summarizer
+# model), freezes the heap and forks workers that share those pages
+# copy-on-write. Each worker serves the shared listening socket with a
+# fixed pool of threads.
+#
+#   python serve.py [--workers N] [--threads N] [--host H] [--port P]
+#
+#   SIGTERM / SIGINT  stop accepting, finish in-flight requests, exit
+#   SIGHUP            rolling restart: start a fresh worker, wait until it
+#                     is ready, then drain one old worker, and so on
+#
+# async OCR jobs live in the worker that created them, so put a sticky
+# proxy in front (or use PLAINSPEAK_WORKERS=1) if clients poll /jobs/<id>
+
+import argparse
+import errno
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+WORKERS = int(os.environ.get('PLAINSPEAK_WORKERS', '0')) or (os.cpu_count() or 1)
+THREADS = int(os.environ.get('PLAINSPEAK_THREADS', '8'))
+GRACEFUL_TIMEOUT = float(os.environ.get('PLAINSPEAK_GRACEFUL_TIMEOUT', '30'))
+BACKLOG = int(os.environ.get('PLAINSPEAK_BACKLOG', '2048'))
+# an idle keep-alive connection holds a thread, so don't let it hold on long
+KEEPALIVE_TIMEOUT = float(os.environ.get('PLAINSPEAK_KEEPALIVE_TIMEOUT', '5'))
+# load the summarizer weights in the master so workers share them
+PRELOAD_SUMMARIZER = os.environ.get('PLAINSPEAK_SUMMARIZER_PRELOAD', '1') != '0'
+
+# a worker that dies this soon after starting is crashing on boot; wait a
+# bit before replacing it instead of forking in a tight loop
+RESPAWN_BACKOFF = 1.0
+
+
+def log(msg: str) -> None:
+    print(f'[serve {os.getpid()}] {msg}', file=sys.stderr, flush=True)
+
+
+class RequestHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    # werkzeug's server on an inherited socket, handing connections to a
+    # fixed pool of threads. When every thread is busy the worker stops
+    # accepting, so new connections wait in the kernel backlog where an idle
+    # worker can pick them up.
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, app, fd: int, threads: int):
+        super().__init__('', 0, app, handler=RequestHandler, fd=fd)
+        self.threads = max(1, threads)
+        self._slots = threading.BoundedSemaphore(self.threads)
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='http')
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._handle, request, client_address)
+        except RuntimeError:
+            # executor already shut down: we are draining
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def drain(self, timeout: float) -> None:
+        # wait for in-flight requests, up to timeout seconds
+        deadline = time.monotonic() + timeout
+        taken = 0
+        while taken < self.threads and time.monotonic() < deadline:
+            if self._slots.acquire(timeout=0.1):
+                taken += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def preload():
+    # everything compiled or loaded at import time lands in the master
+    import app as backend
+    backend.set_ready(False)
+    if PRELOAD_SUMMARIZER:
+        from summarizer import get_summarizer
+        summarizer = get_summarizer()
+        if summarizer.load():
+            log(f'summarizer preloaded in {summarizer.load_ms} ms')
+    # keep the collector from touching (and so copying) the shared objects
+    gc.collect()
+    gc.freeze()
+    return backend
+
+
+def worker_main(backend, fd: int, threads: int, ready_fd: int) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    server = PooledWSGIServer(backend.app, fd, threads)
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever to return, which runs on this
+        # same thread, so it has to be called from another one
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+
+    if os.environ.get('PLAINSPEAK_SUMMARIZER_WARMUP', '0') == '1':
+        from summarizer import get_summarizer
+        get_summarizer().warmup()
+    backend.set_ready(True)
+    os.write(ready_fd, b'1')
+    os.close(ready_fd)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.drain(GRACEFUL_TIMEOUT)
+        server.server_close()
+
+
+class Master:
+    def __init__(self, backend, sock: socket.socket, workers: int, threads: int):
+        self.backend = backend
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.threads = threads
+        self.children = {}  # pid -> {'ready_fd', 'ready', 'started', 'retiring'}
+        self.stopping = False
+        self.reload_requested = False
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_w, False)
+
+    def _wake(self):
+        try:
+            os.write(self._wakeup_w, b'.')
+        except OSError:
+            pass
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+        self._wake()
+
+    def _on_reload(self, signum, frame):
+        self.reload_requested = True
+        self._wake()
+
+    def _on_child(self, signum, frame):
+        self._wake()
+
+    def spawn(self) -> int:
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            os.close(ready_r)
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+            for child in self.children.values():
+                os.close(child['ready_fd'])
+            code = 0
+            try:
+                worker_main(self.backend, self.sock.fileno(), self.threads, ready_w)
+            except BaseException as e:
+                log(f'worker failed: {e!r}')
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(ready_w)
+        self.children[pid] = {'ready_fd': ready_r, 'ready': False, 'started': time.monotonic(), 'retiring': False}
+        return pid
+
+    def _read_ready(self, timeout: float) -> None:
+        fds = [c['ready_fd'] for c in self.children.values() if not c['ready']]
+        try:
+            readable, _, _ = select.select(fds + [self._wakeup_r], [], [], timeout)
+        except InterruptedError:
+            return
+        if self._wakeup_r in readable:
+            try:
+                os.read(self._wakeup_r, 4096)
+            except OSError:
+                pass
+        for pid, child in self.children.items():
+            if child['ready_fd'] in readable and not child['ready']:
+                child['ready'] = os.read(child['ready_fd'], 1) == b'1'
+                if child['ready']:
+                    log(f'worker {pid} ready ({self.ready_count()}/{self.workers})')
+
+    def ready_count(self) -> int:
+        return sum(1 for c in self.children.values() if c['ready'] and not c['retiring'])
+
+    def _reap(self) -> list:
+        dead = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            child = self.children.pop(pid, None)
+            if child is None:
+                continue
+            os.close(child['ready_fd'])
+            dead.append((pid, child, status))
+        return dead
+
+    def _signal(self, pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    def _rolling_restart(self) -> None:
+        old = [pid for pid, c in self.children.items() if not c['retiring']]
+        log(f'rolling restart of {len(old)} worker(s)')
+        for pid in old:
+            new = self.spawn()
+            while not self.stopping and new in self.children and not self.children[new]['ready']:
+                self._read_ready(1.0)
+                self._reap()
+            if self.stopping:
+                return
+            if new not in self.children:
+                log('replacement worker died before it was ready, stopping the restart')
+                return
+            if pid in self.children:
+                self.children[pid]['retiring'] = True
+                self._signal(pid, signal.SIGTERM)
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGCHLD, self._on_child)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while not self.stopping:
+            self._read_ready(1.0)
+            if self.reload_requested:
+                self.reload_requested = False
+                self._rolling_restart()
+                continue
+            for pid, child, status in self._reap():
+                if self.stopping or child['retiring']:
+                    continue
+                log(f'worker {pid} exited with status {status}, replacing it')
+                if time.monotonic() - child['started'] < RESPAWN_BACKOFF:
+                    time.sleep(RESPAWN_BACKOFF)
+            live = sum(1 for c in self.children.values() if not c['retiring'])
+            for _ in range(self.workers - live):
+                if not self.stopping:
+                    self.spawn()
+
+        return self.shutdown()
+
+    def shutdown(self) -> int:
+        log(f'draining {len(self.children)} worker(s)')
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self.children):
+            log(f'worker {pid} did not drain in time, killing it')
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.sock.close()
+        return 0
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '5003')))
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--threads', type=int, default=THREADS)
+    args = parser.parse_args()
+
+    # the warmup has to run in each worker: a torch thread pool started in
+    # the master would not survive the fork
+    warmup = os.environ.pop('PLAINSPEAK_SUMMARIZER_WARMUP', None)
+    backend = preload()
+    if warmup is not None:
+        os.environ['PLAINSPEAK_SUMMARIZER_WARMUP'] = warmup
+
+    sock = bind(args.host, args.port)
+    if not hasattr(os, 'fork'):
+        # no fork on windows: one process, same thread pool
+        log(f'serving on {args.host}:{args.port} with {args.threads} threads (single process)')
+        r, w = os.pipe()
+        worker_main(backend, sock.fileno(), args.threads, w)
+        return
+
+    log(f'serving on {args.host}:{args.port} with {args.workers} workers x {args.threads} threads')
+    sys.exit(Master(backend, sock, args.workers, args.threads).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import re
+
+from classifier import ACTION, CON, PRO, classify
+from document import Document, as_document
+from gazetteer import find_entities
+from metrics import span
+from vocab import simplify_vocabulary
+
+
+def _grade_settings(target_grade: int) -> tuple:
+    # different reading levels need different amounts of text
+    # returns (num_sentences, simplify_vocab, max_words_per_sentence)
+    if target_grade <= 5:
+        return 4, True, 30
+    elif target_grade <= 8:
+        return 4, False, None
+    elif target_grade <= 12:
+        return 7, False, None
+    else:
+        return 10, False, None
+
+
+def _simplify_sentence(sentence: str, simplify_vocab: bool, max_words_per_sentence):
+    if not sentence.strip():
+        return None
+        
+    simplified_sentence = sentence.strip()
+    
+    # for elementary, replace complex words with simple ones
+    if simplify_vocab:
+        with span('vocabulary'):
+            simplified_sentence = simplify_vocabulary(simplified_sentence)
+    
+    # truncate really long sentences
+    if max_words_per_sentence:
+        words = simplified_sentence.split()
+        if len(words) > max_words_per_sentence:
+            simplified_sentence = ' '.join(words[:max_words_per_sentence]) + '...'
+    
+    return simplified_sentence
+
+
+def _join_simplified(simplified_sentences: list) -> str:
+    simplified = '. '.join(simplified_sentences)
+    
+    if simplified and not simplified.endswith('.') and not simplified.endswith('...'):
+        simplified += '.'
+    
+    return simplified
+
+
+def simplify_sentences(text, target_grade: int = 8) -> list:
+    # the simplified sentences that simplify_text_rule_based joins
+    sentences = _split_sentences(text)
+    num_sentences, simplify_vocab, max_words_per_sentence = _grade_settings(target_grade)
+    
+    simplified_sentences = []
+    for sentence in sentences[:num_sentences]:
+        simplified_sentence = _simplify_sentence(sentence, simplify_vocab, max_words_per_sentence)
+        if simplified_sentence is not None:
+            simplified_sentences.append(simplified_sentence)
+    
+    return simplified_sentences
+
+
+def simplify_text_rule_based(text: str, target_grade: int = 8) -> str:
+    return _join_simplified(simplify_sentences(text, target_grade)) or text[:200]
+
+
+CAPITALIZED_NAME = re.compile(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\b")
+
+
+def extract_actions(text) -> list:
+    return [a for a, _ in extract_action_items(text)]
+
+
+def extract_action_items(text) -> list:
+    # [(action text, deadline or None), ...], read off the sentence labels
+    doc = as_document(text)
+    
+    # remove duplicates as we go
+    seen = set()
+    unique_actions = []
+    
+    for s, labels in zip(doc.sentences, doc.labels):
+        a = _action_text(s, labels)
+        if a is None:
+            continue
+        key = a.lower()
+        if key not in seen:
+            seen.add(key)
+            unique_actions.append((a, labels.deadline))
+    
+    return unique_actions
+
+
+def _action_text(s: str, labels=None):
+    # look for action keywords
+    if labels is None:
+        labels = classify(s)
+    if ACTION not in labels:
+        return None
+    
+    s_clean = s.strip()
+    
+    # dont make actions too long
+    if len(s_clean) > 240:
+        s_clean = s_clean[:237].rstrip() + "..."
+    
+    return s_clean
+
+
+def _split_sentences(text: str) -> list:
+    return as_document(text).sentences
+
+
+def _detect_pros_cons(doc):
+    # accepts a Document, or a plain list of sentences from older callers
+    if isinstance(doc, Document):
+        pairs = zip(doc.sentences, doc.labels)
+    else:
+        pairs = ((s, classify(s)) for s in doc)
+    
+    pros = []
+    cons = []
+    
+    for s, labels in pairs:
+        is_pro = PRO in labels
+        is_con = CON in labels
+        if is_pro and not is_con:
+            pros.append(s.strip())
+        elif is_con and not is_pro:
+            cons.append(s.strip())
+    
+    return pros[:8], cons[:8]
+
+
+def _detect_stakeholders(doc):
+    text = as_document(doc).text
+    
+    # civic terms, agencies, counties, districts and programs in one pass
+    found = [{'name': name, 'role': role} for name, role in find_entities(text)]
+    names = {s['name'] for s in found}
+    
+    # also look for capitalized names
+    caps = CAPITALIZED_NAME.findall(text)
+    
+    for c in caps[:5]:
+        if c not in names:
+            names.add(c)
+            found.append({'name': c, 'role': 'Mentioned'})
+    
+    return found[:8]
@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+
+from microbatch import MicroBatcher
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# a directory saved with save_pretrained() (any seq2seq summarizer, e.g.
+# sshleifer/distilbart-cnn-6-6), or a hub id that is already in the local
+# cache; nothing is downloaded at request time
+SUMMARIZER_MODEL = os.environ.get('PLAINSPEAK_SUMMARIZER_MODEL', os.path.join(BASE_DIR, 'models', 'summarizer'))
+SUMMARIZER_MAX_INPUT_TOKENS = int(os.environ.get('PLAINSPEAK_SUMMARIZER_MAX_TOKENS', '1024'))
+SUMMARIZER_QUANTIZE = os.environ.get('PLAINSPEAK_SUMMARIZER_QUANTIZE', '1') != '0'
+SUMMARIZER_THREADS = int(os.environ.get('PLAINSPEAK_SUMMARIZER_THREADS', '0'))
+# requests arriving within BATCH_WAIT_MS of each other share one padded
+# forward pass, up to BATCH_MAX of them; BATCH_MAX=1 turns batching off
+SUMMARIZER_BATCH_MAX = int(os.environ.get('PLAINSPEAK_SUMMARIZER_BATCH_MAX', '8'))
+SUMMARIZER_BATCH_WAIT_MS = float(os.environ.get('PLAINSPEAK_SUMMARIZER_BATCH_WAIT_MS', '5'))
+
+FALLBACK_CHARS = 400
+
+
+def truncate_summary(text: str) -> str:
+    # what /analyze has always returned when there is no model
+    return text[:FALLBACK_CHARS] + ('...' if len(text) > FALLBACK_CHARS else '')
+
+
+class Summarizer:
+    # loads the model once, on first use or from warmup(), and never again;
+    # if loading fails the failure is remembered too, so a missing model
+    # costs one attempt per process instead of one per request
+
+    def __init__(self, model_path: str, max_input_tokens: int = 1024, quantize: bool = True, threads: int = 0,
+                 batch_max: int = 1, batch_wait_ms: float = 0.0):
+        self.model_path = model_path
+        self.max_input_tokens = max_input_tokens
+        self.quantize = quantize
+        self.threads = threads
+        self._model = None
+        self._tokenizer = None
+        self._torch = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        # torch already spreads one generate() over every core, so running
+        # two at once only makes both slower
+        self._infer_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.error = None
+        self.load_ms = None
+        self.quantized = False
+        self.calls = 0
+        self.fallbacks = 0
+        self.infer_seconds = 0.0
+        self._batcher = None
+        if batch_max > 1:
+            self._batcher = MicroBatcher(
+                self._run_batch, max_batch=batch_max, max_wait_ms=batch_wait_ms, name='summarizer-batch',
+            )
+
+    @property
+    def available(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> bool:
+        if self._loaded:
+            return self._model is not None
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+        return self._model is not None
+
+    def _load(self) -> None:
+        # torch and transformers are imported here, not at module level: the
+        # import alone takes seconds, and only a process that loads the
+        # model should pay for it
+        try:
+            import torch
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        except Exception:
+            self.error = 'torch/transformers not installed'
+            return
+        start = time.perf_counter()
+        try:
+            if self.threads > 0:
+                torch.set_num_threads(self.threads)
+            tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=True)
+            model = AutoModelForSeq2SeqLM.from_pretrained(self.model_path, local_files_only=True)
+            model.eval()
+            if self.quantize:
+                # int8 weights for every Linear layer, activations quantized
+                # on the fly; roughly halves CPU latency for bart/t5 sized models
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                self.quantized = True
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+            return
+        self._torch = torch
+        self._tokenizer = tokenizer
+        self._model = model
+        self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        print(f'summarizer loaded from {self.model_path} in {self.load_ms} ms'
+              + (' (int8)' if self.quantized else ''))
+
+    def warmup(self) -> bool:
+        # load and push one short input through, so the first real request
+        # doesn't pay for lazy allocations inside torch either
+        if not self.load():
+            return False
+        self._generate('Warm up the summarizer before the first request arrives.', 16, 1)
+        return True
+
+    def _input_cap(self) -> int:
+        limit = getattr(self._tokenizer, 'model_max_length', None) or self.max_input_tokens
+        # tokenizers without a limit report a huge sentinel value
+        return min(self.max_input_tokens, limit)
+
+    def _generate_batch(self, texts: list, max_length: int, min_length: int) -> list:
+        # one padded forward pass for all texts -> [(summary, input tokens), ...]
+        inputs = self._tokenizer(
+            texts,
+            truncation=True,
+            max_length=self._input_cap(),
+            padding=True,
+            return_tensors='pt',
+        )
+        n_tokens = inputs['attention_mask'].sum(dim=1).tolist()
+        # an input shorter than min_length lowers the bound for itself only:
+        # one generate call per distinct bound, so a text's summary doesn't
+        # depend on what it happened to be batched with
+        groups = {}
+        for i, n in enumerate(n_tokens):
+            groups.setdefault(min(min_length, int(n)), []).append(i)
+        summaries = [None] * len(texts)
+        with self._infer_lock, self._torch.inference_mode():
+            for bound, rows in groups.items():
+                if len(rows) == len(texts):
+                    group = inputs
+                else:
+                    group = {k: v[rows] for k, v in inputs.items()}
+                output = self._model.generate(
+                    **group,
+                    max_length=max_length,
+                    min_length=bound,
+                    do_sample=False,
+                )
+                for i, summary in zip(rows, self._tokenizer.batch_decode(output, skip_special_tokens=True)):
+                    summaries[i] = summary
+        return [(summary.strip(), int(n)) for summary, n in zip(summaries, n_tokens)]
+
+    def _generate(self, text: str, max_length: int, min_length: int) -> tuple:
+        return self._generate_batch([text], max_length, min_length)[0]
+
+    def _run_batch(self, key: tuple, texts: list) -> list:
+        max_length, min_length = key
+        return [(summary, n, len(texts)) for summary, n in self._generate_batch(texts, max_length, min_length)]
+
+    def summarize(self, text: str, max_length: int = 160, min_length: int = 40) -> tuple:
+        # (summary, timing); timing has 'summary_ms', 'input_tokens',
+        # 'batch_size' and 'engine' ('model' or 'truncate')
+        start = time.perf_counter()
+        summary = None
+        n_tokens = 0
+        batch_size = 1
+        if self.load():
+            try:
+                if self._batcher is not None:
+                    summary, n_tokens, batch_size = self._batcher((max_length, min_length), text)
+                else:
+                    summary, n_tokens = self._generate(text, max_length, min_length)
+            except Exception as e:
+                print('summarizer failed: ' + str(e))
+                summary = None
+        engine = 'model' if summary else 'truncate'
+        if not summary:
+            summary = truncate_summary(text)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.calls += 1
+            if engine == 'truncate':
+                self.fallbacks += 1
+            else:
+                self.infer_seconds += elapsed
+        return summary, {
+            'summary_ms': round(elapsed * 1000, 1),
+            'input_tokens': n_tokens,
+            'batch_size': batch_size,
+            'engine': engine,
+        }
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            model_calls = self.calls - self.fallbacks
+            return {
+                'model': self.model_path,
+                'loaded': self._model is not None,
+                'quantized': self.quantized,
+                'error': self.error,
+                'load_ms': self.load_ms,
+                'max_input_tokens': self.max_input_tokens,
+                'calls': self.calls,
+                'fallbacks': self.fallbacks,
+                'avg_summary_ms': round(self.infer_seconds * 1000 / model_calls, 1) if model_calls else None,
+                'batching': self._batcher.stats() if self._batcher is not None else None,
+            }
+
+
+_summarizer = None
+_summarizer_lock = threading.Lock()
+
+
+def get_summarizer() -> Summarizer:
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                _summarizer = Summarizer(
+                    SUMMARIZER_MODEL,
+                    max_input_tokens=SUMMARIZER_MAX_INPUT_TOKENS,
+                    quantize=SUMMARIZER_QUANTIZE,
+                    threads=SUMMARIZER_THREADS,
+                    batch_max=SUMMARIZER_BATCH_MAX,
+                    batch_wait_ms=SUMMARIZER_BATCH_WAIT_MS,
+                )
+    return _summarizer
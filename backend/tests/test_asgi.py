@@ -0,0 +1,123 @@
+# streamed routes through asgi.app, driven in process with hand-made ASGI
+# messages (no sockets, no uvicorn)
+# usage: cd backend && python -m unittest discover tests
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-test-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+
+import app as backend
+import asgi
+
+
+def tearDownModule():
+    shutil.rmtree(_tmp, True)
+
+
+def _scope(method: str, path: str, query: bytes = b'', headers=()) -> dict:
+    return {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'root_path': '', 'query_string': query,
+        'headers': list(headers), 'server': ('test', 80), 'client': ('127.0.0.1', 1),
+    }
+
+
+async def _call(app, scope, chunks, on_body=None) -> tuple:
+    # (status, [body chunks]); chunks is a list of request body pieces, and
+    # a piece that's an asyncio.Event is waited on before the next is sent
+    inbox = asyncio.Queue()
+    status = []
+    body = []
+
+    async def feed():
+        for i, chunk in enumerate(chunks):
+            if isinstance(chunk, asyncio.Event):
+                await chunk.wait()
+                continue
+            more = any(not isinstance(c, asyncio.Event) for c in chunks[i + 1:])
+            await inbox.put({'type': 'http.request', 'body': chunk, 'more_body': more})
+
+    async def receive():
+        return await inbox.get()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['body']:
+            body.append(message['body'])
+            if on_body is not None:
+                on_body(message['body'])
+
+    feeder = asyncio.ensure_future(feed())
+    await app(scope, receive, send)
+    feeder.cancel()
+    return status[0], body
+
+
+class StreamedRoutesTest(unittest.TestCase):
+    def setUp(self):
+        self.app = asgi.PlainSpeakASGI(backend.app)
+
+    def test_simplify_stream_reads_body_as_it_arrives(self):
+        async def run():
+            # the second half is only sent once the first sentence is out,
+            # so this hangs if the body is read whole before routing
+            first_out = asyncio.Event()
+
+            def on_body(chunk):
+                if b'"type":"sentence"' in chunk:
+                    first_out.set()
+
+            scope = _scope('POST', '/simplify_stream', b'target_grade=5', [(b'content-type', b'text/plain')])
+            return await asyncio.wait_for(_call(self.app, scope, [
+                b'You must file the form by May 1. The fee is ',
+                first_out,
+                b'ten dollars. Call the office with questions.',
+            ], on_body), timeout=10)
+
+        status, body = asyncio.run(run())
+        self.assertEqual(status, 200)
+        lines = [json.loads(line) for line in b''.join(body).decode('utf-8').splitlines()]
+        self.assertEqual([line['type'] for line in lines if line['type'] == 'sentence'], ['sentence'] * 3)
+        self.assertEqual(lines[-1]['type'], 'done')
+        self.assertIn('You must file the form by May 1.', lines[-1]['simplified_text'])
+
+    def test_job_events_stream_until_done(self):
+        job = backend._jobs.create('ocr')
+
+        def finish():
+            backend._jobs.mark_running(job)
+            backend._jobs.finish(job, {'full_text': 'done'})
+
+        async def run():
+            started = asyncio.Event()
+
+            def on_body(chunk):
+                if not started.is_set():
+                    started.set()
+                    threading.Timer(0.05, finish).start()
+
+            scope = _scope('GET', f'/jobs/{job.id}/events')
+            return await asyncio.wait_for(_call(self.app, scope, [b''], on_body), timeout=10)
+
+        status, body = asyncio.run(run())
+        self.assertEqual(status, 200)
+        events = [block for block in b''.join(body).decode('utf-8').split('\n\n') if block.startswith('event:')]
+        self.assertTrue(events[0].startswith('event: status'))
+        self.assertTrue(events[-1].startswith('event: done'))
+        self.assertEqual(json.loads(events[-1].split('data: ', 1)[1])['result'], {'full_text': 'done'})
+
+
+if __name__ == '__main__':
+    unittest.main()
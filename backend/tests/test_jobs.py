@@ -0,0 +1,66 @@
+# JobTable's bound, and the 429 the async OCR route turns it into
+# usage: cd backend && python -m unittest discover tests
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-test-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+
+from PIL import Image
+
+import app as backend
+from jobs import JobTable, JobTableFull
+
+
+def tearDownModule():
+    shutil.rmtree(_tmp, True)
+
+
+class JobTableTest(unittest.TestCase):
+    def test_full_table_of_unfinished_jobs_refuses(self):
+        table = JobTable(max_jobs=2)
+        table.create('ocr')
+        table.create('ocr')
+        with self.assertRaises(JobTableFull) as caught:
+            table.create('ocr')
+        self.assertGreaterEqual(caught.exception.retry_after, 1)
+        self.assertEqual(len(table), 2)
+
+    def test_full_table_drops_the_oldest_finished_job(self):
+        table = JobTable(max_jobs=2)
+        first = table.create('ocr')
+        second = table.create('ocr')
+        table.finish(first, {})
+        third = table.create('ocr')
+        self.assertIsNone(table.get(first.id))
+        self.assertIs(table.get(second.id), second)
+        self.assertIs(table.get(third.id), third)
+
+
+class AsyncOCRTest(unittest.TestCase):
+    def test_full_table_is_429(self):
+        saved = backend._jobs
+        backend._jobs = JobTable(max_jobs=1)
+        try:
+            backend._jobs.create('ocr')
+            png = BytesIO()
+            Image.new('L', (64, 64), 255).save(png, 'PNG')
+            resp = backend.app.test_client().post(
+                '/ocr_simplify?async=1', data={'image': (BytesIO(png.getvalue()), 'page.png')},
+                content_type='multipart/form-data')
+        finally:
+            backend._jobs = saved
+        self.assertEqual(resp.status_code, 429)
+        self.assertGreaterEqual(int(resp.headers['Retry-After']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# TranslationMemory against a fake translator that counts its calls
+# usage: cd backend && python -m unittest discover tests
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_memory import TranslationMemory
+
+
+class _Result:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeTranslator:
+    # googletrans' shape: a string gives one result, a list one per item
+    # (each of which would be its own HTTP request). "Translating" is
+    # upper-casing, line by line.
+
+    def __init__(self, merge_lines: bool = False):
+        self.merge_lines = merge_lines
+        self.payloads = []
+
+    def translate(self, payload, dest):
+        self.payloads.append(payload)
+        if isinstance(payload, list):
+            return [_Result(p.upper()) for p in payload]
+        text = payload.upper()
+        if self.merge_lines:
+            text = text.replace('\n', ' ')
+        return _Result(text)
+
+
+class AsyncFakeTranslator(FakeTranslator):
+    async def translate(self, payload, dest):
+        return FakeTranslator.translate(self, payload, dest)
+
+
+TEXT = 'You must file by May 1.  The fee is ten dollars.\nCall the office.'
+
+
+class TranslationMemoryTest(unittest.TestCase):
+    def test_misses_go_in_one_request(self):
+        translator = FakeTranslator()
+        memory = TranslationMemory(translator)
+        self.assertEqual(memory.translate(TEXT, 'es'), TEXT.upper())
+        self.assertEqual(translator.payloads,
+                         ['You must file by May 1.\nThe fee is ten dollars.\nCall the office.'])
+        self.assertEqual(memory.stats()['calls'], 1)
+
+    def test_known_sentences_are_not_sent_again(self):
+        translator = FakeTranslator()
+        memory = TranslationMemory(translator)
+        memory.translate('You must file by May 1. The fee is ten dollars.', 'es')
+        self.assertEqual(memory.translate(TEXT, 'es'), TEXT.upper())
+        self.assertEqual(translator.payloads[1:], ['Call the office.'])
+        self.assertEqual(memory.translate(TEXT, 'es'), TEXT.upper())
+        self.assertEqual(len(translator.payloads), 2)
+        stats = memory.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (5, 3))
+
+    def test_languages_are_remembered_apart(self):
+        translator = FakeTranslator()
+        memory = TranslationMemory(translator)
+        memory.translate(TEXT, 'es')
+        memory.translate(TEXT, 'fr')
+        self.assertEqual(len(translator.payloads), 2)
+
+    def test_line_breaks_inside_a_sentence(self):
+        translator = FakeTranslator()
+        memory = TranslationMemory(translator)
+        self.assertEqual(memory.translate('Bring your ID\nand a bill. Then wait.', 'es'),
+                         'BRING YOUR ID AND A BILL. THEN WAIT.')
+        self.assertEqual(len(translator.payloads), 1)
+
+    def test_falls_back_per_sentence_when_lines_merge(self):
+        translator = FakeTranslator(merge_lines=True)
+        memory = TranslationMemory(translator)
+        self.assertEqual(memory.translate(TEXT, 'es'), TEXT.upper())
+        self.assertEqual(translator.payloads[1],
+                         ['You must file by May 1.', 'The fee is ten dollars.', 'Call the office.'])
+
+    def test_batches_stay_under_the_size_cap(self):
+        translator = FakeTranslator()
+        memory = TranslationMemory(translator, max_batch_chars=60)
+        text = ' '.join(f'Sentence number {i} is here.' for i in range(6))
+        self.assertEqual(memory.translate(text, 'es'), text.upper())
+        self.assertEqual(len(translator.payloads), 3)
+        self.assertTrue(all(len(p) <= 60 for p in translator.payloads))
+
+    def test_atranslate_batches_too(self):
+        translator = AsyncFakeTranslator()
+        memory = TranslationMemory(translator)
+        self.assertEqual(asyncio.run(memory.atranslate(TEXT, 'es')), TEXT.upper())
+        self.assertEqual(asyncio.run(memory.atranslate(TEXT, 'es')), TEXT.upper())
+        self.assertEqual(len(translator.payloads), 1)
+
+    def test_translate_with_a_coroutine_translator(self):
+        translator = AsyncFakeTranslator()
+        memory = TranslationMemory(translator)
+        self.assertEqual(memory.translate(TEXT, 'es'), TEXT.upper())
+        self.assertEqual(len(translator.payloads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# which uploads are one picture and which are a multi-page document, with
+# tesseract replayed from a recording
+# usage: cd backend && python -m unittest discover tests
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'benchmarks'))
+
+_tmp = tempfile.mkdtemp(prefix='plainspeak-test-')
+os.environ['PLAINSPEAK_HISTORY_DB'] = os.path.join(_tmp, 'history.db')
+os.environ.pop('PLAINSPEAK_CACHE_DIR', None)
+
+from PIL import Image
+
+import app as backend
+import recorded_ocr
+
+
+def tearDownModule():
+    shutil.rmtree(_tmp, True)
+
+
+def _frames(n: int) -> list:
+    return [Image.new('RGB', (320, 240), (255, 255, 255 - i)) for i in range(n)]
+
+
+def _encode(fmt: str, frames: list) -> bytes:
+    out = BytesIO()
+    frames[0].save(out, fmt, save_all=len(frames) > 1, append_images=frames[1:])
+    return out.getvalue()
+
+
+class UploadKindTest(unittest.TestCase):
+    def setUp(self):
+        self.client = backend.app.test_client()
+        backend._ocr_cache.clear()
+        data = recorded_ocr.recordings()['notice_page']
+        self.replay = recorded_ocr.replay(backend, data)
+        self.replay.__enter__()
+
+    def tearDown(self):
+        self.replay.__exit__(None, None, None)
+
+    def post(self, body: bytes, name: str, query: str = ''):
+        return self.client.post('/ocr_simplify' + query, data={'image': (BytesIO(body), name)},
+                                content_type='multipart/form-data')
+
+    def assertSingleImage(self, resp):
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        self.assertEqual(resp.mimetype, 'application/json')
+        self.assertIn('simplified_text', resp.get_json())
+
+    def test_phone_jpeg_is_one_picture(self):
+        # phone cameras save MPO: a jpeg with a second, preview frame
+        self.assertSingleImage(self.post(_encode('MPO', _frames(2)), 'photo.jpg'))
+
+    def test_animated_gif_is_one_picture(self):
+        self.assertSingleImage(self.post(_encode('GIF', _frames(3)), 'scan.gif'))
+
+    def test_phone_jpeg_async(self):
+        resp = self.post(_encode('MPO', _frames(2)), 'photo.jpg', '?async=1')
+        self.assertEqual(resp.status_code, 202, resp.get_data(as_text=True))
+
+    def test_tiff_pages_stream(self):
+        resp = self.post(_encode('TIFF', _frames(2)), 'scan.tiff')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['page'] for line in lines if line['type'] == 'page'], [1, 2])
+        self.assertEqual(lines[-1]['type'], 'done')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import inspect
+import re
+import threading
+from collections import OrderedDict
+
+# same boundary as document.SENTENCE_BOUNDARY, but captured so the original
+# whitespace between sentences survives reassembly
+_SPLIT_KEEP = re.compile(r"((?<=[.!?])\s+)")
+
+
+class TranslationMemory:
+    # translator is anything with googletrans' interface: translate(text or
+    # list, dest=) returning an object with a .text attribute, or a list of
+    # them for a list (or a coroutine resolving to either), so a local fake
+    # works in tests
+
+    def __init__(self, translator, max_entries: int = 50000, max_batch_chars: int = 4500):
+        # max_batch_chars stays under the ~5000 characters google takes in
+        # one request
+        self.translator = translator
+        self.max_entries = max_entries
+        self.max_batch_chars = max_batch_chars
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+
+    @staticmethod
+    def _key(sentence: str, dest: str) -> tuple:
+        return hashlib.sha1(sentence.encode('utf-8')).hexdigest(), dest
+
+    def _lookup(self, text: str, dest: str) -> tuple:
+        # (pieces, found, missing): what the memory already has and the
+        # distinct sentences that still need the translator
+        pieces = _SPLIT_KEEP.split(text)
+        # even indexes are sentences, odd ones the whitespace between them
+        sentences = [p for p in pieces[::2] if p.strip()]
+
+        found = {}
+        missing = []
+        with self._lock:
+            for s in sentences:
+                key = self._key(s, dest)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[s] = self._memory[key]
+                    self.hits += 1
+                elif s not in found and s not in missing:
+                    missing.append(s)
+                    self.misses += 1
+        return pieces, found, missing
+
+    @staticmethod
+    def _assemble(pieces: list, found: dict) -> str:
+        out = []
+        for i, p in enumerate(pieces):
+            out.append(found.get(p, p) if i % 2 == 0 else p)
+        return ''.join(out)
+
+    def translate(self, text: str, dest: str) -> str:
+        pieces, found, missing = self._lookup(text, dest)
+        for batch in self._batches(missing):
+            texts = _split_lines(self._call(_join_lines(batch), dest), len(batch))
+            if texts is None:
+                # the lines didn't come back one for one; ask per sentence
+                texts = [r.text for r in _as_list(self._call(batch, dest))]
+            found.update(self._remember(batch, dest, texts))
+        return self._assemble(pieces, found)
+
+    async def atranslate(self, text: str, dest: str) -> str:
+        # same as translate(), for the asyncio server: awaits the translator
+        # when its translate() is a coroutine (googletrans 4), otherwise runs
+        # it on a thread so the event loop keeps going
+        pieces, found, missing = self._lookup(text, dest)
+        for batch in self._batches(missing):
+            texts = _split_lines(await self._acall(_join_lines(batch), dest), len(batch))
+            if texts is None:
+                texts = [r.text for r in _as_list(await self._acall(batch, dest))]
+            found.update(self._remember(batch, dest, texts))
+        return self._assemble(pieces, found)
+
+    def _batches(self, sentences: list) -> list:
+        # the sentences we haven't seen before, grouped into requests of at
+        # most max_batch_chars. googletrans sends one HTTP request per list
+        # item, so each group goes as a single string, one sentence a line.
+        batches = []
+        size = 0
+        for s in sentences:
+            if batches and size + len(s) + 1 <= self.max_batch_chars:
+                batches[-1].append(s)
+                size += len(s) + 1
+            else:
+                batches.append([s])
+                size = len(s)
+        return batches
+
+    def _call(self, payload, dest: str):
+        results = self.translator.translate(payload, dest=dest)
+        if inspect.isawaitable(results):
+            results = asyncio.run(results)
+        with self._lock:
+            self.calls += 1
+        return results
+
+    async def _acall(self, payload, dest: str):
+        if inspect.iscoroutinefunction(self.translator.translate):
+            results = await self.translator.translate(payload, dest=dest)
+        else:
+            results = await asyncio.to_thread(self.translator.translate, payload, dest=dest)
+        with self._lock:
+            self.calls += 1
+        return results
+
+    def _remember(self, sentences: list, dest: str, texts: list) -> dict:
+        translated = dict(zip(sentences, texts))
+        with self._lock:
+            for s, t in translated.items():
+                self._memory[self._key(s, dest)] = t
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        return translated
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'calls': self.calls,
+                'entries': len(self._memory),
+                'max_entries': self.max_entries,
+            }
+
+
+def _join_lines(sentences: list) -> str:
+    # one sentence a line; line breaks inside a sentence become spaces so
+    # the line count is the sentence count
+    return '\n'.join(' '.join(s.split()) for s in sentences)
+
+
+def _split_lines(result, count: int):
+    # the translated lines of a _join_lines request, or None when there
+    # aren't exactly count of them
+    lines = [line.strip() for line in _as_list(result)[0].text.split('\n') if line.strip()]
+    return lines if len(lines) == count else None
+
+
+def _as_list(results) -> list:
+    return results if isinstance(results, list) else [results]
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import re
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+VOCAB_PATH = os.environ.get('PLAINSPEAK_VOCAB', os.path.join(DATA_DIR, 'vocabulary.json'))
+
+
+def load_vocabulary(path: str = VOCAB_PATH) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    # keys are matched case-insensitively, so store them lowercased
+    return {' '.join(k.lower().split()): v for k, v in raw.items() if k.strip()}
+
+
+def _trie_pattern(node: dict) -> str:
+    # '' marks the end of a word; everything else is the next character
+    alts = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    optional = '' in node
+
+    if not alts:
+        return ''
+    if len(alts) == 1 and not optional:
+        return alts[0]
+
+    body = '(?:' + '|'.join(alts) + ')'
+    return body + '?' if optional else body
+
+
+def build_pattern(words) -> re.Pattern:
+    # one regex shaped like a trie, so each position only tries the branches
+    # that share its prefix instead of every word in the list
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    if not trie:
+        return re.compile(r'(?!x)x')
+    return re.compile(r'\b' + _trie_pattern(trie) + r'\b', re.IGNORECASE)
+
+
+class VocabularySimplifier:
+    def __init__(self, replacements: dict):
+        self.replacements = dict(replacements)
+        self.pattern = build_pattern(self.replacements)
+        digest = hashlib.sha1(json.dumps(self.replacements, sort_keys=True).encode('utf-8'))
+        self.version = digest.hexdigest()[:12]
+
+    def _replace(self, m) -> str:
+        return self.replacements[m.group(0).lower()]
+
+    def __call__(self, text: str) -> str:
+        if not text:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+
+_simplifier = VocabularySimplifier(load_vocabulary())
+VOCAB_VERSION = _simplifier.version
+
+
+def simplify_vocabulary(text: str) -> str:
+    return _simplifier(text)
@@ -78,10 +78,36 @@ class HomeScreen(Screen):
         super().__init__(**kwargs)
 
 
+def apply_merge_patch(target, patch):
+    # JSON merge patch (RFC 7386), what /simplify sends for an edited resubmit
+    out = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            out.pop(key, None)
+        elif isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = apply_merge_patch(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+def set_null(target, path):
+    # fields that became null come as paths next to the patch, since null in
+    # a merge patch deletes the key; target is a fresh copy, copy each level
+    node = target
+    for key in path[:-1]:
+        node[key] = dict(node.get(key) or {})
+        node = node[key]
+    node[path[-1]] = None
+
+
 class SimplifyScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.target_lang = None
+        # last full result, so resubmitting an edit only redoes what changed
+        self.last_result = None
+        self.submitted_text = ''
         self.dyslexia_mode = False
 
         page = MDBoxLayout(orientation='vertical', padding=dp(16), spacing=dp(16))
@@ -151,10 +177,13 @@ class SimplifyScreen(Screen):
             self.result_label.text = 'Please enter some text first.'
             return
         app._last_input_text = text_to_simplify
+        self.submitted_text = text_to_simplify
         api_url = app.api_base + "/simplify"
         body = {"text": text_to_simplify}
         if self.target_lang:
             body["target_lang"] = self.target_lang
+        if self.last_result and self.last_result.get('result_id'):
+            body["previous_result_id"] = self.last_result['result_id']
         headers = {'Content-type': 'application/json'}
         UrlRequest(api_url, req_body=json.dumps(body), req_headers=headers, on_success=self._on_ok, on_failure=self._on_err, on_error=self._on_err)
         self.result_label.text = 'Processing...'
@@ -162,6 +191,24 @@ class SimplifyScreen(Screen):
 
     @mainthread
     def _on_ok(self, _, result):
+        if 'patch' in result:
+            if not self.last_result or result.get('base_result_id') != self.last_result.get('result_id'):
+                # patch against a result we no longer hold; ask for the whole thing
+                self.last_result = None
+                self.simplify_text()
+                return
+            patch = result
+            result = apply_merge_patch(self.last_result, patch['patch'])
+            for path in patch.get('nulls') or []:
+                set_null(result, path)
+            result['original_text'] = self.submitted_text
+            result['result_id'] = patch['result_id']
+            splice = patch.get('actions_splice')
+            if splice:
+                actions = list(self.last_result.get('actions') or [])
+                actions[splice['start']:splice['start'] + splice['delete']] = splice['insert']
+                result['actions'] = actions
+        self.last_result = result
         simplified_text = result.get('simplified_text', 'Could not parse result.')
         translated_text = result.get('translated_text')
         actions = result.get('actions', []) or []
@@ -60,22 +60,25 @@ def install_npm_dependencies(web_dir):
     
     return True
 
-def start_backend():
-    print("\nstarting backend -> localhost:5003")
+def start_backend(prod=False):
+    # prod runs the pre-fork server (backend/serve.py) instead of flask's debug server
+    print("\nstarting backend -> localhost:5003" + (" (production server)" if prod else ""))
     
     backend_dir = Path(__file__).parent / "backend"
-    app_file = backend_dir / "app.py"
+    app_file = backend_dir / ("serve.py" if prod else "app.py")
     
     if not app_file.exists():
-        print("[error] cant find backend/app.py at " + str(app_file))
+        print("[error] cant find backend/" + app_file.name + " at " + str(app_file))
         return None
     
     try:
         proc = subprocess.Popen(
             ['/usr/local/bin/python3', str(app_file)],
             cwd=backend_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            # the production server logs every request; nobody reads these
+            # pipes, so let it write to the terminal instead of filling them
+            stdout=None if prod else subprocess.PIPE,
+            stderr=None if prod else subprocess.PIPE,
             text=True
         )
         
@@ -154,7 +157,8 @@ def main():
     print("launching servers")
     print("="*60)
     
-    backend_proc = start_backend()
+    prod = "--prod" in sys.argv or os.environ.get("PLAINSPEAK_SERVE") == "prod"
+    backend_proc = start_backend(prod)
     if not backend_proc:
         print("\n[error] backend startup failed, bailing")
         sys.exit(1)
@@ -1,3 +1,4 @@
+import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
 import { motion } from "framer-motion";
 import { FileText, Image, Clock } from "lucide-react";
@@ -16,23 +17,40 @@ interface HistoryItem {
 export function HistoryList() {
   const [historyItems, setHistoryItems] = useState<HistoryItem[]>([]);
   const [loading, setLoading] = useState(true);
+  // the backend sends history a page at a time, newest first; nextCursor
+  // is where the next page starts, or null once everything is loaded
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [pageStart, setPageStart] = useState(0);
+
+  const fetchPage = async (cursor?: number): Promise<HistoryItem[]> => {
+    try {
+      const response = await apiService.getHistory(cursor);
+      setNextCursor(response.next_cursor ?? null);
+      return response.items || [];
+    } catch (error) {
+      console.error("Failed to fetch history:", error);
+      return [];
+    }
+  };
 
   useEffect(() => {
     // Fetch history from backend
-    const fetchHistory = async () => {
-      try {
-        const response = await apiService.getHistory();
-        setHistoryItems(response.items || []);
-      } catch (error) {
-        console.error("Failed to fetch history:", error);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchHistory();
+    fetchPage()
+      .then(setHistoryItems)
+      .finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    if (nextCursor === null || loadingMore) return;
+    setLoadingMore(true);
+    const items = await fetchPage(nextCursor);
+    // only the new page animates in
+    setPageStart(historyItems.length);
+    setHistoryItems([...historyItems, ...items]);
+    setLoadingMore(false);
+  };
+
   if (loading) {
     return (
       <Card className="p-12 text-center">
@@ -58,7 +76,7 @@ export function HistoryList() {
             key={item.id}
             initial={{ opacity: 0, y: 20 }}
             animate={{ opacity: 1, y: 0 }}
-            transition={{ delay: index * 0.1 }}
+            transition={{ delay: Math.max(0, index - pageStart) * 0.1 }}
           >
             <Card className="p-4 cursor-pointer hover:shadow-md transition-all">
               <div className="flex items-start gap-4">
@@ -97,6 +115,11 @@ export function HistoryList() {
           </motion.div>
         ))
       )}
+      {nextCursor !== null && (
+        <Button variant="outline" onClick={loadMore} disabled={loadingMore} className="w-full">
+          {loadingMore ? "Loading..." : "Load more"}
+        </Button>
+      )}
     </div>
   );
 }
@@ -6,11 +6,13 @@ import { Input } from "@/components/ui/input";
 import { Loader2, Sparkles, Volume2, Copy, Check, Send, ArrowLeft } from "lucide-react";
 import { motion } from "framer-motion";
 import { toast } from "sonner";
-import apiService from "@/services/api";
+import apiService, { type SimplifyResponse } from "@/services/api";
 
 export function SimplifyForm() {
   const [inputText, setInputText] = useState("");
   const [simplifiedText, setSimplifiedText] = useState("");
+  // last result, so resubmitting an edited text only redoes what changed
+  const [lastResult, setLastResult] = useState<SimplifyResponse | undefined>();
   const [isLoading, setIsLoading] = useState(false);
   const [isSpeaking, setIsSpeaking] = useState(false);
   const [copied, setCopied] = useState(false);
@@ -41,7 +43,8 @@ export function SimplifyForm() {
       // Only send target_lang if it's not English
       const targetLang = selectedLang !== "en" ? selectedLang : undefined;
 
-      const result = await apiService.simplifyText(inputText, targetGrade, targetLang);
+      const result = await apiService.simplifyText(inputText, targetGrade, targetLang, lastResult);
+      setLastResult(result);
       
       // Use translated text if available, otherwise use simplified text
       const displayText = result.translated_text || result.simplified_text;
@@ -13,18 +13,69 @@ export interface SimplifyRequest {
   targetLang?: string;
 }
 
+export interface ReadabilityScores {
+  words: number;
+  sentences: number;
+  flesch_reading_ease: number | null;
+  flesch_kincaid_grade: number | null;
+  smog_index: number | null;
+  dale_chall: number | null;
+  difficult_words: number;
+}
+
 export interface SimplifyResponse {
   original_text: string;
   simplified_text: string;
   simplification_type: string;
   translated_text?: string;
   target_lang?: string;
+  target_grade?: number;
+  actions?: string[];
+  result_id?: string;
   readability: {
-    before: number;
-    after: number;
+    before: ReadabilityScores;
+    after: ReadabilityScores;
+    meets_target: boolean | null;
   };
 }
 
+// what /simplify sends back for an edit of a result it still has: a JSON
+// merge patch (RFC 7386) against that result instead of the whole thing,
+// with actions as a splice and fields that became null as paths in nulls
+// (null in a merge patch deletes the key)
+export interface SimplifyPatchResponse {
+  result_id: string;
+  base_result_id: string;
+  patch: Record<string, unknown>;
+  nulls?: string[][];
+  actions_splice?: { start: number; delete: number; insert: string[] };
+  changed_sentences: { start: number; removed: number; added: number };
+}
+
+function applyMergePatch<T>(target: T, patch: Record<string, unknown>): T {
+  const out: Record<string, unknown> = { ...(target as Record<string, unknown>) };
+  for (const [key, value] of Object.entries(patch)) {
+    if (value === null) {
+      delete out[key];
+    } else if (typeof value === 'object' && !Array.isArray(value) && typeof out[key] === 'object' && out[key] !== null) {
+      out[key] = applyMergePatch(out[key], value as Record<string, unknown>);
+    } else {
+      out[key] = value;
+    }
+  }
+  return out as T;
+}
+
+function setNull(target: Record<string, unknown>, path: string[]): void {
+  // target is a fresh copy from applyMergePatch; copy each level on the way down
+  let node = target;
+  for (const key of path.slice(0, -1)) {
+    node[key] = { ...(node[key] as Record<string, unknown>) };
+    node = node[key] as Record<string, unknown>;
+  }
+  node[path[path.length - 1]] = null;
+}
+
 export interface AnalyzeImageResponse {
   extracted_text: string;
   simplified_text: string;
@@ -46,14 +97,39 @@ export interface HistoryItem {
 }
 
 export const apiService = {
-  // Simplify text
-  simplifyText: async (text: string, targetGrade?: number, targetLang?: string): Promise<SimplifyResponse> => {
-    const response = await api.post<SimplifyResponse>('/simplify', {
+  // Simplify text; pass the previous result when resubmitting an edit so
+  // only the changed sentences are redone
+  simplifyText: async (
+    text: string,
+    targetGrade?: number,
+    targetLang?: string,
+    previous?: SimplifyResponse,
+  ): Promise<SimplifyResponse> => {
+    const response = await api.post<SimplifyResponse | SimplifyPatchResponse>('/simplify', {
       text,
       target_grade: targetGrade,
       target_lang: targetLang,
+      previous_result_id: previous?.result_id,
     });
-    return response.data;
+    const data = response.data;
+    if (previous && 'patch' in data && data.base_result_id === previous.result_id) {
+      const result = { ...applyMergePatch(previous, data.patch), original_text: text, result_id: data.result_id };
+      for (const path of data.nulls ?? []) {
+        setNull(result as unknown as Record<string, unknown>, path);
+      }
+      if (data.actions_splice) {
+        const { start, delete: count, insert } = data.actions_splice;
+        const actions = [...(previous.actions ?? [])];
+        actions.splice(start, count, ...insert);
+        result.actions = actions;
+      }
+      return result;
+    }
+    if ('patch' in data) {
+      // patch against a result we no longer hold; ask for the whole thing
+      return apiService.simplifyText(text, targetGrade, targetLang);
+    }
+    return data as SimplifyResponse;
   },
 
   // Analyze image
@@ -87,8 +163,10 @@ export const apiService = {
   },
 
   // Get history
-  getHistory: async (): Promise<{ items: HistoryItem[] }> => {
-    const response = await api.get('/history');
+  getHistory: async (cursor?: number, limit?: number): Promise<{ items: HistoryItem[]; next_cursor: number | null }> => {
+    const response = await api.get('/history', {
+      params: { cursor, limit },
+    });
     return response.data;
   },
 };